@@ -1,8 +1,10 @@
 """
 Admin endpoints for system management
 """
+import hashlib
+import json
 from typing import List, Dict, Any
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
 
 from ...core.database import get_database
@@ -122,9 +124,30 @@ async def delete_user(
 
 @router.get("/system/status")
 async def get_system_status(
+    request: Request,
+    response: Response,
     current_user: User = Depends(require_manager_or_above())
 ):
-    """Get system status and health information"""
+    """Get system status and health information
+    
+    Responses carry an ETag so clients can revalidate with If-None-Match
+    and receive a bodyless 304 when nothing has changed.
+    """
+    
+    system_status = await _collect_system_status(current_user)
+    
+    body = json.dumps(system_status, sort_keys=True, default=str)
+    etag = '"%s"' % hashlib.sha1(body.encode("utf-8")).hexdigest()
+    
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    
+    response.headers["ETag"] = etag
+    return system_status
+
+
+async def _collect_system_status(current_user: User) -> Dict[str, Any]:
+    """Gather secret, vector store, embedding and document status"""
     
     try:
         # Check secret management status
@@ -314,6 +337,18 @@ async def reload_embedding_service(
         )
 
 
+@router.post("/cache/web-search/clear")
+async def clear_web_search_results(
+    current_user: User = Depends(require_admin())
+):
+    """Drop cached web search results (e.g. after a sensitive query was cached)"""
+    
+    from ...services.rag_pipeline import clear_web_search_cache
+    
+    clear_web_search_cache()
+    return {"status": "success", "message": "Web search cache cleared"}
+
+
 @router.get("/embedding-models/benchmark")
 async def benchmark_embedding_models(
     current_user: User = Depends(require_admin())
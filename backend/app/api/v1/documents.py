@@ -220,6 +220,9 @@ async def update_document(
     db.commit()
     db.refresh(document)
     
+    # Cached answers may rely on the old access level or department
+    DocumentIngestionPipeline.notify_document_changed(document.id)
+    
     return document
 
 
@@ -253,4 +256,6 @@ async def delete_document(
     db.delete(document)
     db.commit()
     
+    DocumentIngestionPipeline.notify_document_changed(document_id)
+    
     return {"message": "Document deleted successfully"}
\ No newline at end of file
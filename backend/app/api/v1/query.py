@@ -1,8 +1,10 @@
 """
 Query processing endpoints for the RAG pipeline
 """
+import json
 from typing import List, Dict, Any
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from ...core.database import get_database
@@ -34,7 +36,9 @@ async def process_query(
             query=query_request.query,
             user_role=current_user.role.value,
             department=user_department,
-            use_web_search=query_request.use_web_search
+            use_web_search=query_request.use_web_search,
+            session_id=str(current_user.id),
+            no_cache=query_request.no_cache
         )
         
         if result["status"] == "error":
@@ -57,6 +61,39 @@ async def process_query(
         )
 
 
+@router.post("/ask/stream")
+async def stream_query(
+    query_request: QueryRequest,
+    current_user: User = Depends(get_current_active_user)
+):
+    """Process a user query, streaming answer tokens as server-sent events
+    
+    Each token is sent as a `data: {"token": ...}` event, followed by one
+    `final` event carrying the complete result with sources and scores.
+    """
+    user_department = getattr(current_user, 'department', None)
+    
+    async def event_stream():
+        async for item in rag_pipeline.process_query_stream(
+            query=query_request.query,
+            user_role=current_user.role.value,
+            department=user_department,
+            use_web_search=query_request.use_web_search,
+            session_id=str(current_user.id),
+            no_cache=query_request.no_cache
+        ):
+            if isinstance(item, str):
+                yield f"data: {json.dumps({'token': item})}\n\n"
+            else:
+                yield f"event: final\ndata: {json.dumps(item['_final'], default=str)}\n\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.get("/history")
 async def get_conversation_history(
     current_user: User = Depends(get_current_active_user)
@@ -64,7 +101,7 @@ async def get_conversation_history(
     """Get conversation history for the current user"""
     
     try:
-        history = await rag_pipeline.get_conversation_history()
+        history = await rag_pipeline.get_conversation_history(str(current_user.id))
         return {"history": history}
         
     except Exception as e:
@@ -81,7 +118,7 @@ async def clear_conversation_history(
     """Clear conversation history for the current user"""
     
     try:
-        rag_pipeline.clear_conversation_history()
+        rag_pipeline.clear_conversation_history(str(current_user.id))
         return {"message": "Conversation history cleared successfully"}
         
     except Exception as e:
@@ -32,6 +32,7 @@ class Settings(BaseSettings):
     HUGGINGFACE_MODEL_NAME: str = "sentence-transformers/all-MiniLM-L6-v2"  # For HuggingFace models
     EMBEDDING_DEVICE: str = "cpu"  # Options: "cpu", "cuda", "mps"
     EMBEDDING_BATCH_SIZE: int = 32
+    QUERY_EMBEDDING_CACHE_SIZE: int = 1024
     
     # Azure Key Vault
     AZURE_CLIENT_ID: Optional[str] = None
@@ -47,6 +48,8 @@ class Settings(BaseSettings):
     
     # Web Search
     TAVILY_API_KEY: Optional[str] = None
+    WEB_SEARCH_CACHE_SIZE: int = 512
+    WEB_SEARCH_CACHE_TTL: int = 300  # seconds
     
     # LangSmith
     LANGCHAIN_TRACING_V2: bool = True
@@ -70,6 +73,24 @@ class Settings(BaseSettings):
     CHUNK_OVERLAP: int = 200
     TOP_K_RETRIEVAL: int = 5
     SIMILARITY_THRESHOLD: float = 0.7
+    CONFIDENT_RETRIEVAL_THRESHOLD: float = 0.85  # answer without the agent above this relevance
+    RETRIEVAL_BATCH_WINDOW_MS: int = 10  # coalesce concurrent searches arriving within this window
+    RETRIEVAL_MAX_BATCH: int = 32
+    AGENT_EXECUTOR_CACHE_SIZE: int = 64  # executors cached per (role, department)
+    TOOL_TIMEOUT_SECONDS: int = 60  # limit for synchronous tool calls
+    
+    # Conversation history sent to the agent, per session
+    CHAT_HISTORY_MAX_MESSAGES: int = 10
+    CHAT_HISTORY_TOKEN_BUDGET: int = 1500
+    CHAT_SUMMARY_MODEL: Optional[str] = "gpt-3.5-turbo"  # summarizes older turns; None disables
+    CHAT_SUMMARY_MAX_TOKENS: int = 200
+    CHAT_SESSION_IDLE_SECONDS: int = 1800  # conversation context is dropped after this much inactivity
+    
+    # Semantic response cache (opt-in)
+    SEMANTIC_CACHE_ENABLED: bool = False
+    SEMANTIC_CACHE_THRESHOLD: float = 0.92
+    SEMANTIC_CACHE_SIZE: int = 256
+    SEMANTIC_CACHE_TTL: int = 600  # seconds
     
     @validator("BACKEND_CORS_ORIGINS", pre=True)
     def assemble_cors_origins(cls, v):
@@ -54,6 +54,9 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("Shutting down AI Knowledge Assistant API")
+    
+    from .services.rag_pipeline import close_http_client
+    await close_http_client()
 
 
 # Create FastAPI application
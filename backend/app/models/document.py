@@ -103,6 +103,7 @@ class QueryRequest(BaseModel):
     query: str
     use_web_search: bool = False
     max_results: int = 5
+    no_cache: bool = False  # keep sensitive queries and their answers out of shared caches
 
 
 class QueryResponse(BaseModel):
@@ -74,6 +74,7 @@ class User(UserBase):
 class Token(BaseModel):
     access_token: str
     token_type: str
+    user: Optional[User] = None  # included on login so clients can skip /auth/me
 
 
 class TokenData(BaseModel):
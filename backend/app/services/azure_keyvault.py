@@ -58,7 +58,7 @@ class AzureKeyVaultService:
         
         try:
             # Run the synchronous operation in a thread pool
-            secret = await asyncio.get_event_loop().run_in_executor(
+            secret = await asyncio.get_running_loop().run_in_executor(
                 None, self.client.get_secret, secret_name
             )
             return secret.value
@@ -78,7 +78,7 @@ class AzureKeyVaultService:
         
         try:
             # Run the synchronous operation in a thread pool
-            await asyncio.get_event_loop().run_in_executor(
+            await asyncio.get_running_loop().run_in_executor(
                 None, self.client.set_secret, secret_name, secret_value
             )
             logger.info(f"Secret '{secret_name}' stored successfully")
@@ -96,7 +96,7 @@ class AzureKeyVaultService:
         
         try:
             # Run the synchronous operation in a thread pool
-            await asyncio.get_event_loop().run_in_executor(
+            await asyncio.get_running_loop().run_in_executor(
                 None, self.client.begin_delete_secret, secret_name
             )
             logger.info(f"Secret '{secret_name}' deleted successfully")
@@ -117,7 +117,7 @@ class AzureKeyVaultService:
         
         try:
             # Run the synchronous operation in a thread pool
-            secret_properties = await asyncio.get_event_loop().run_in_executor(
+            secret_properties = await asyncio.get_running_loop().run_in_executor(
                 None, lambda: list(self.client.list_properties_of_secrets())
             )
             
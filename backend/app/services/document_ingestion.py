@@ -2,8 +2,9 @@
 Document ingestion pipeline with OpenAI embeddings and vector storage
 """
 import os
+import time
 import hashlib
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable
 from pathlib import Path
 import asyncio
 import aiofiles
@@ -33,6 +34,7 @@ from llama_index.core.extractors import TitleExtractor, QuestionsAnsweredExtract
 
 from ..core.config import settings
 from ..models.document import DocumentChunk
+from ..utils.cache import TTLCache
 
 
 class DocumentProcessor:
@@ -159,6 +161,9 @@ class EmbeddingService:
         self.embeddings = get_embedding_service()
         logger.info(f"Initialized embedding service: {type(self.embeddings).__name__}")
         
+        # Recently embedded queries, so repeated agent lookups skip the model
+        self._query_cache = TTLCache(maxsize=settings.QUERY_EMBEDDING_CACHE_SIZE, ttl_seconds=3600)
+        
         # Get model info for logging
         if hasattr(self.embeddings, 'get_model_info'):
             model_info = self.embeddings.get_model_info()
@@ -177,14 +182,37 @@ class EmbeddingService:
     
     async def generate_query_embedding(self, query: str) -> List[float]:
         """Generate embedding for a single query"""
+        cached = self._query_cache.get(query)
+        if cached is not None:
+            return cached
+        
         try:
             embedding = await self.embeddings.aembed_query(query)
             logger.debug(f"Generated query embedding with dimension: {len(embedding)}")
+            self._query_cache.set(query, embedding)
             return embedding
         except Exception as e:
             logger.error(f"Error generating query embedding: {str(e)}")
             raise Exception(f"Error generating query embedding: {str(e)}")
     
+    async def generate_query_embeddings(self, queries: List[str]) -> List[List[float]]:
+        """Generate embeddings for several queries, embedding cache misses in one call"""
+        embeddings = [self._query_cache.get(query) for query in queries]
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if not missing:
+            return embeddings
+        
+        try:
+            generated = await self.embeddings.aembed_documents([queries[i] for i in missing])
+        except Exception as e:
+            logger.error(f"Error generating query embeddings: {str(e)}")
+            raise Exception(f"Error generating query embeddings: {str(e)}")
+        
+        for i, embedding in zip(missing, generated):
+            self._query_cache.set(queries[i], embedding)
+            embeddings[i] = embedding
+        return embeddings
+    
     def get_model_info(self) -> Dict[str, Any]:
         """Get information about the embedding model"""
         if hasattr(self.embeddings, 'get_model_info'):
@@ -241,36 +269,73 @@ class VectorStoreService:
                 where=where_clause
             )
             
-            # Format results
-            formatted_results = []
-            if results['documents'] and results['documents'][0]:
-                for i in range(len(results['documents'][0])):
-                    formatted_results.append({
-                        'content': results['documents'][0][i],
-                        'metadata': results['metadatas'][0][i],
-                        'distance': results['distances'][0][i] if results['distances'] else None,
-                        'id': results['ids'][0][i]
-                    })
+            return self._format_query_results(results, 0)
+        except Exception as e:
+            raise Exception(f"Error performing similarity search: {str(e)}")
+    
+    async def batch_similarity_search(self, query_embeddings: List[List[float]], k: int = 5,
+                                      filter_metadata: Dict[str, Any] = None) -> List[List[Dict[str, Any]]]:
+        """Search for documents similar to each embedding in a single query"""
+        try:
+            where_clause = filter_metadata if filter_metadata else None
+            
+            results = self.collection.query(
+                query_embeddings=query_embeddings,
+                n_results=k,
+                where=where_clause
+            )
             
-            return formatted_results
+            return [self._format_query_results(results, i) for i in range(len(query_embeddings))]
         except Exception as e:
             raise Exception(f"Error performing similarity search: {str(e)}")
+    
+    @staticmethod
+    def _format_query_results(results: Dict[str, Any], index: int) -> List[Dict[str, Any]]:
+        """Format the results for one query embedding of a collection query"""
+        formatted_results = []
+        if results['documents'] and results['documents'][index]:
+            for i in range(len(results['documents'][index])):
+                formatted_results.append({
+                    'content': results['documents'][index][i],
+                    'metadata': results['metadatas'][index][i],
+                    'distance': results['distances'][index][i] if results['distances'] else None,
+                    'id': results['ids'][index][i]
+                })
+        
+        return formatted_results
 
 
 class DocumentIngestionPipeline:
     """Main document ingestion pipeline orchestrator"""
     
+    # Callbacks notified with the document id after a document is ingested,
+    # updated or deleted
+    _ingestion_listeners: List[Callable[[int], None]] = []
+    
     def __init__(self):
         self.processor = DocumentProcessor()
         self.chunker = TextChunker()
         self.embedding_service = EmbeddingService()
         self.vector_store = VectorStoreService()
     
+    @classmethod
+    def add_ingestion_listener(cls, callback: Callable[[int], None]):
+        """Register a callback to run whenever any pipeline ingests a document,
+        or a document's content or access changes"""
+        cls._ingestion_listeners.append(callback)
+    
+    @classmethod
+    def notify_document_changed(cls, document_id: int):
+        """Run the registered listeners for a changed document"""
+        for listener in cls._ingestion_listeners:
+            listener(document_id)
+    
     async def ingest_document(self, file_path: str, document_id: int, 
                             metadata: Dict[str, Any] = None) -> Dict[str, Any]:
         """Complete document ingestion pipeline"""
         try:
             start_time = datetime.now()
+            start_mono = time.monotonic()
             
             # Extract file information
             file_info = Path(file_path)
@@ -301,8 +366,10 @@ class DocumentIngestionPipeline:
             # Step 4: Store in vector database
             await self.vector_store.add_documents(chunks, embeddings)
             
+            self.notify_document_changed(document_id)
+            
             # Calculate processing time
-            processing_time = (datetime.now() - start_time).total_seconds()
+            processing_time = time.monotonic() - start_mono
             
             return {
                 "document_id": document_id,
@@ -320,11 +387,16 @@ class DocumentIngestionPipeline:
             }
     
     async def search_documents(self, query: str, user_role: str = "employee", 
-                             department: str = None, k: int = 5) -> List[Dict[str, Any]]:
-        """Search documents with role-based filtering"""
+                             department: str = None, k: int = 5,
+                             query_embedding: Optional[List[float]] = None) -> List[Dict[str, Any]]:
+        """Search documents with role-based filtering
+        
+        Pass query_embedding when the caller has already embedded the query.
+        """
         try:
             # Generate query embedding
-            query_embedding = await self.embedding_service.generate_query_embedding(query)
+            if query_embedding is None:
+                query_embedding = await self.embedding_service.generate_query_embedding(query)
             
             # Build metadata filter based on user role
             filter_metadata = self._build_access_filter(user_role, department)
@@ -339,6 +411,33 @@ class DocumentIngestionPipeline:
         except Exception as e:
             raise Exception(f"Error searching documents: {str(e)}")
     
+    async def batch_search_documents(self, queries: List[str], user_role: str = "employee",
+                                     department: str = None, k: int = 5,
+                                     query_embeddings: Optional[List[Optional[List[float]]]] = None
+                                     ) -> List[List[Dict[str, Any]]]:
+        """Search documents for several queries sharing one access scope
+        
+        query_embeddings may hold precomputed embeddings aligned with
+        queries; only queries whose entry is None are embedded.
+        """
+        try:
+            query_embeddings = list(query_embeddings) if query_embeddings else [None] * len(queries)
+            missing = [i for i, embedding in enumerate(query_embeddings) if embedding is None]
+            if missing:
+                generated = await self.embedding_service.generate_query_embeddings(
+                    [queries[i] for i in missing]
+                )
+                for i, embedding in zip(missing, generated):
+                    query_embeddings[i] = embedding
+            filter_metadata = self._build_access_filter(user_role, department)
+            
+            return await self.vector_store.batch_similarity_search(
+                query_embeddings, k=k, filter_metadata=filter_metadata
+            )
+            
+        except Exception as e:
+            raise Exception(f"Error searching documents: {str(e)}")
+    
     def _build_access_filter(self, user_role: str, department: str = None) -> Dict[str, Any]:
         """Build access control filter for vector search"""
         filter_conditions = {}
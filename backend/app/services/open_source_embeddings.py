@@ -48,7 +48,7 @@ class SentenceTransformerEmbeddings(Embeddings):
         self._initialize_model()
         
         # Thread pool for async operations
-        self.executor = ThreadPoolExecutor(max_workers=4)
+        self.executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="embeddings")
     
     def _initialize_model(self):
         """Initialize the Sentence Transformer model"""
@@ -114,12 +114,12 @@ class SentenceTransformerEmbeddings(Embeddings):
     
     async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
         """Async version of embed_documents"""
-        loop = asyncio.get_event_loop()
+        loop = asyncio.get_running_loop()
         return await loop.run_in_executor(self.executor, self.embed_documents, texts)
     
     async def aembed_query(self, text: str) -> List[float]:
         """Async version of embed_query"""
-        loop = asyncio.get_event_loop()
+        loop = asyncio.get_running_loop()
         return await loop.run_in_executor(self.executor, self.embed_query, text)
     
     def get_model_info(self) -> Dict[str, Any]:
@@ -157,7 +157,7 @@ class HuggingFaceEmbeddings(Embeddings):
         self._initialize_model()
         
         # Thread pool for async operations
-        self.executor = ThreadPoolExecutor(max_workers=4)
+        self.executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="embeddings")
     
     def _initialize_model(self):
         """Initialize the HuggingFace model and tokenizer"""
@@ -241,12 +241,12 @@ class HuggingFaceEmbeddings(Embeddings):
     
     async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
         """Async version of embed_documents"""
-        loop = asyncio.get_event_loop()
+        loop = asyncio.get_running_loop()
         return await loop.run_in_executor(self.executor, self.embed_documents, texts)
     
     async def aembed_query(self, text: str) -> List[float]:
         """Async version of embed_query"""
-        loop = asyncio.get_event_loop()
+        loop = asyncio.get_running_loop()
         return await loop.run_in_executor(self.executor, self.embed_query, text)
     
     def get_model_info(self) -> Dict[str, Any]:
@@ -2,9 +2,15 @@
 Agentic RAG pipeline with LangChain for intelligent query processing
 """
 import asyncio
-from typing import List, Dict, Any, Optional, Tuple
+import concurrent.futures
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict, defaultdict, deque
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple, Coroutine, AsyncIterator, Union, Deque
 from datetime import datetime
-import json
 
 # LangChain imports
 from langchain.agents import AgentExecutor, create_openai_functions_agent
@@ -14,18 +20,305 @@ from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain.tools import Tool, BaseTool
 from langchain.schema import AgentAction, AgentFinish
 from langchain_openai import ChatOpenAI
-from langchain.memory import ConversationBufferWindowMemory
+from openai import AsyncOpenAI
+import httpx
 from langchain.callbacks import AsyncCallbackHandler
-from langchain.schema import BaseMessage
+from langchain.schema import BaseMessage, HumanMessage, AIMessage, SystemMessage
+import tiktoken
 
 # Web search
-from tavily import TavilyClient
 
 # Internal services
 from .document_ingestion import DocumentIngestionPipeline
 from .open_source_embeddings import get_embedding_service
 from ..core.config import settings
 from ..models.user import UserRole
+from ..utils.cache import TTLCache, SemanticCache
+
+logger = logging.getLogger(__name__)
+
+
+_HTTP_LIMITS = httpx.Limits(max_keepalive_connections=64, max_connections=128)
+
+# Pooled HTTP client shared by outbound async API calls on the application loop
+_http_client = httpx.AsyncClient(limits=_HTTP_LIMITS, timeout=30)
+
+
+async def close_http_client():
+    """Close the shared HTTP clients (called on application shutdown)"""
+    await _http_client.aclose()
+    if _background_http_client is not None:
+        await asyncio.wrap_future(
+            asyncio.run_coroutine_threadsafe(_background_http_client.aclose(), _background_loop)
+        )
+
+
+TAVILY_SEARCH_URL = "https://api.tavily.com/search"
+
+# Formatted web search results keyed by query, shared across tool instances
+_web_search_cache = TTLCache(
+    maxsize=settings.WEB_SEARCH_CACHE_SIZE,
+    ttl_seconds=settings.WEB_SEARCH_CACHE_TTL
+)
+
+
+def clear_web_search_cache():
+    """Drop all cached web search results"""
+    _web_search_cache.clear()
+
+# Observation templates for retrieval and web search results
+_DOC_TEMPLATE = """
+Document {i}:
+Content: {content}
+Source: {source}
+Department: {department}
+Relevance Score: {relevance:.2f}
+""".format
+
+_WEB_TEMPLATE = """
+Web Result {i}:
+Title: {title}
+Content: {content}
+URL: {url}
+""".format
+
+
+def _truncate(text: str, limit: int) -> str:
+    """Shorten text to limit characters, marking the cut with an ellipsis"""
+    return text if len(text) <= limit else f"{text[:limit]}..."
+
+
+def _format_document_results(results: List[Dict[str, Any]]) -> str:
+    """Format vector search results as an agent observation"""
+    parts = []
+    for i, result in enumerate(results, 1):
+        metadata = result.get('metadata') or {}
+        parts.append(_DOC_TEMPLATE(
+            i=i,
+            content=_truncate(result['content'], 500),
+            source=metadata.get('file_name', 'Unknown'),
+            department=metadata.get('department', 'General'),
+            relevance=1 - (result.get('distance') or 0.0)
+        ))
+    return "\n".join(parts)
+
+
+def _format_web_results(results: List[Dict[str, Any]]) -> str:
+    """Format Tavily search results as an agent observation"""
+    parts = []
+    for i, result in enumerate(results, 1):
+        parts.append(_WEB_TEMPLATE(
+            i=i,
+            title=result.get('title', 'No title'),
+            content=_truncate(result.get('content', 'No content'), 400),
+            url=result.get('url', 'No URL')
+        ))
+    return "\n".join(parts)
+
+
+# Question wrapper used when answering directly from gathered tool output
+_DIRECT_ANSWER_TEMPLATE = """Answer the question using the information gathered below.
+
+{context}
+
+Question: {query}""".format
+
+# Agent input when internal documents were already retrieved for the query
+_PREFETCHED_CONTEXT_TEMPLATE = """{query}
+
+Internal documents already retrieved for this question:
+{context}
+
+Only call document_retrieval again if you need different information.""".format
+
+
+# Prompt folding messages that leave a session's history window into its summary
+_SUMMARY_TEMPLATE = """Update the running summary of a conversation with the messages below.
+Keep facts, names and decisions that later questions may refer to. Be brief.
+
+Current summary: {summary}
+
+Messages:
+{transcript}
+
+Updated summary:""".format
+
+
+# Source type reported for observations of each retrieval tool
+_TOOL_SOURCE_TYPES = {
+    "document_retrieval": "document",
+    "web_search": "web",
+    "parallel_search": "hybrid"
+}
+
+
+def _build_role_prompt(user_role: str) -> ChatPromptTemplate:
+    """Create the role-specific agent prompt"""
+    
+    role_context = {
+        "employee": "You are an AI assistant helping an employee. Provide helpful information while respecting access controls.",
+        "manager": "You are an AI assistant helping a manager. You have access to additional management information and can provide strategic insights.",
+        "admin": "You are an AI assistant helping an administrator. You have full access to all information and can provide comprehensive insights."
+    }
+    
+    system_message = f"""
+    {role_context.get(user_role, role_context["employee"])}
+    
+    You have access to the following tools:
+    - document_retrieval: Search internal company documents and knowledge base
+    - web_search: Search the web for current information (if available)
+    - parallel_search: Search internal documents and the web at once (if available)
+    - knowledge_analysis: Analyze and synthesize information from multiple sources
+    
+    Guidelines:
+    1. Always try to find information in internal documents first
+    2. Use web search only when internal information is insufficient or outdated
+    3. When both internal and current web information are plausibly needed, prefer parallel_search over separate document_retrieval and web_search calls
+    4. Provide accurate, well-sourced answers
+    5. Respect role-based access controls
+    6. If you cannot find information, clearly state this
+    7. Synthesize information from multiple sources when needed
+    8. Always cite your sources
+    
+    When answering:
+    - Be concise but comprehensive
+    - Structure your response clearly
+    - Highlight key points
+    - Provide actionable insights when appropriate
+    """
+    
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", system_message),
+        MessagesPlaceholder(variable_name="chat_history"),
+        ("human", "{input}"),
+        MessagesPlaceholder(variable_name="agent_scratchpad")
+    ])
+    
+    return prompt
+
+
+# Agent prompts are fixed per role, so compile them once at import
+_ROLE_PROMPTS: Dict[str, ChatPromptTemplate] = {
+    role.value: _build_role_prompt(role.value) for role in UserRole
+}
+
+
+# Phrases asking for analysis rather than a single lookup
+_ANALYTICAL_MARKERS = ("analyze", "analyse", "summarize", "summarise", "evaluate", "explain why")
+
+# Phrases suggesting a query needs multi-step agent reasoning, matched as
+# whole words so e.g. "firstname", "first-aid" or "comparable" do not count
+_MULTI_STEP_MARKERS = re.compile(
+    r"(?<![\w-])(?:compare|comparison|versus|vs|difference between|step[ -]by[ -]step"
+    r"|pros and cons|and then|first|after that)(?![\w-])"
+)
+
+
+def _needs_iterative_reasoning(query: str) -> bool:
+    """Cheap heuristic for queries a single fan-out retrieval may not answer"""
+    lowered = query.lower()
+    return (
+        len(lowered.split()) > 40
+        or lowered.count("?") > 1
+        or _MULTI_STEP_MARKERS.search(lowered) is not None
+    )
+
+
+# Openers and references that tie a query to earlier turns of the conversation
+_FOLLOW_UP_MARKERS = re.compile(
+    r"^(?:and|also|but|so|then|what about|how about)(?![\w-])"
+    r"|(?<![\w-])(?:it|its|that|this|these|those|they|them|their|he|she|him|her"
+    r"|above|previous|earlier|same|again|more)(?![\w-])"
+)
+
+
+def _is_follow_up(query: str) -> bool:
+    """Cheap heuristic for queries that only make sense with the chat history"""
+    return _FOLLOW_UP_MARKERS.search(query.lower().strip()) is not None
+
+
+def _classify_query(query: str) -> str:
+    """Classify a query as a "simple" single lookup or "complex" for the agent"""
+    lowered = query.lower()
+    if (
+        len(lowered.split()) < 15
+        and not _needs_iterative_reasoning(query)
+        and not any(marker in lowered for marker in _ANALYTICAL_MARKERS)
+    ):
+        return "simple"
+    return "complex"
+
+
+@lru_cache(maxsize=1)
+def _get_token_encoding():
+    """Tokenizer used to bound chat history (shared by the GPT-3.5/4 models)"""
+    return tiktoken.get_encoding("cl100k_base")
+
+
+def _count_tokens(text: str) -> int:
+    """Token count of text, treating special-token strings such as <|endoftext|> as plain text"""
+    return len(_get_token_encoding().encode(text, disallowed_special=()))
+
+
+# Long-lived event loop used to run async tool code from sync callers
+_background_loop: Optional[asyncio.AbstractEventLoop] = None
+_background_loop_lock = threading.Lock()
+
+
+def _get_background_loop() -> asyncio.AbstractEventLoop:
+    """Start the background event loop thread on first use"""
+    global _background_loop
+    
+    with _background_loop_lock:
+        if _background_loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="rag-tools-loop", daemon=True).start()
+            _background_loop = loop
+    
+    return _background_loop
+
+
+def _run_sync(coro: Coroutine) -> Any:
+    """Run a coroutine to completion from synchronous code
+    
+    Works whether or not the caller is already inside a running event loop,
+    and reuses one loop instead of creating and tearing down a loop per call.
+    """
+    loop = _get_background_loop()
+    try:
+        running_loop = asyncio.get_running_loop()
+    except RuntimeError:
+        running_loop = None
+    
+    # Blocking on the background loop from its own thread would never return
+    if running_loop is loop:
+        coro.close()
+        raise RuntimeError("_run_sync cannot be called from the background tool loop")
+    
+    future = asyncio.run_coroutine_threadsafe(coro, loop)
+    try:
+        return future.result(timeout=settings.TOOL_TIMEOUT_SECONDS)
+    except concurrent.futures.TimeoutError:
+        future.cancel()
+        raise
+
+
+# An AsyncClient's connection pool is bound to one event loop, so tool code
+# running on the background loop gets a client of its own
+_background_http_client: Optional[httpx.AsyncClient] = None
+
+
+def _get_http_client() -> httpx.AsyncClient:
+    """Pooled HTTP client for the calling event loop"""
+    global _background_http_client
+    
+    if _background_loop is None or asyncio.get_running_loop() is not _background_loop:
+        return _http_client
+    
+    # Only ever created from the background loop's own thread
+    if _background_http_client is None:
+        _background_http_client = httpx.AsyncClient(limits=_HTTP_LIMITS, timeout=30)
+    return _background_http_client
 
 
 class LangSmithCallbackHandler(AsyncCallbackHandler):
@@ -33,19 +326,136 @@ class LangSmithCallbackHandler(AsyncCallbackHandler):
     
     def __init__(self):
         super().__init__()
-        self.start_time = None
+        self.start_time: Optional[float] = None
         self.metrics = {}
     
     async def on_chain_start(self, serialized: Dict[str, Any], inputs: Dict[str, Any], **kwargs):
-        self.start_time = datetime.now()
+        self.start_time = time.perf_counter()
         self.metrics = {"inputs": inputs}
     
     async def on_chain_end(self, outputs: Dict[str, Any], **kwargs):
-        if self.start_time:
-            self.metrics["duration"] = (datetime.now() - self.start_time).total_seconds()
+        if self.start_time is not None:
+            self.metrics["duration"] = time.perf_counter() - self.start_time
             self.metrics["outputs"] = outputs
 
 
+class TokenQueueCallbackHandler(AsyncCallbackHandler):
+    """Callback handler that forwards streamed LLM tokens to a queue"""
+    
+    def __init__(self):
+        super().__init__()
+        self.queue: asyncio.Queue = asyncio.Queue()
+    
+    async def on_llm_new_token(self, token: str, **kwargs):
+        # Function-call deltas arrive as empty content tokens
+        if token:
+            self.queue.put_nowait(token)
+
+
+class _RepeatedToolCall(Exception):
+    """Raised to stop an agent run that repeats an earlier tool call"""
+
+
+class LoopGuardCallbackHandler(AsyncCallbackHandler):
+    """Per-run callback handler that stops the agent on a repeated tool call
+    
+    Observations seen so far are kept in steps so the caller can still
+    produce an answer from them.
+    """
+    
+    raise_error = True
+    
+    def __init__(self):
+        super().__init__()
+        self.seen: set = set()
+        self.steps: List[Tuple[AgentAction, str]] = []
+        self._last_action: Optional[AgentAction] = None
+    
+    async def on_agent_action(self, action: AgentAction, **kwargs):
+        key = (action.tool, str(action.tool_input))
+        if key in self.seen:
+            raise _RepeatedToolCall(action.tool)
+        
+        self.seen.add(key)
+        self._last_action = action
+    
+    async def on_tool_end(self, output: str, **kwargs):
+        if self._last_action is not None:
+            self.steps.append((self._last_action, str(output)))
+            self._last_action = None
+
+
+class BatchingRetriever:
+    """Coalesces concurrent document searches into batched vector store queries
+    
+    Searches sharing an access scope (role, department, k) that arrive within
+    RETRIEVAL_BATCH_WINDOW_MS of each other are embedded and queried together.
+    """
+    
+    def __init__(self, ingestion_pipeline: DocumentIngestionPipeline):
+        self.ingestion_pipeline = ingestion_pipeline
+        self.window = settings.RETRIEVAL_BATCH_WINDOW_MS / 1000
+        self.max_batch = settings.RETRIEVAL_MAX_BATCH
+        self._pending: Dict[Tuple, List[Tuple[str, Optional[List[float]], asyncio.Future]]] = {}
+        # The event loop only keeps weak references to tasks
+        self._tasks: set = set()
+        self._lock = threading.Lock()
+    
+    async def search(self, query: str, user_role: str, department: Optional[str] = None,
+                     k: int = 5, query_embedding: Optional[List[float]] = None) -> List[Dict[str, Any]]:
+        """Search documents, sharing a vector store query with concurrent callers
+        
+        Pass query_embedding when the caller has already embedded the query.
+        """
+        loop = asyncio.get_running_loop()
+        # Futures belong to one loop, so sync tool calls on the background loop batch separately
+        key = (loop, user_role, department, k)
+        future = loop.create_future()
+        
+        with self._lock:
+            batch = self._pending.get(key)
+            if batch is None:
+                batch = self._pending[key] = []
+                loop.call_later(self.window, self._flush, key, batch)
+            batch.append((query, query_embedding, future))
+            full = len(batch) >= self.max_batch
+        
+        if full:
+            self._flush(key, batch)
+        return await future
+    
+    def _flush(self, key: Tuple, batch: List[Tuple[str, Optional[List[float]], asyncio.Future]]):
+        with self._lock:
+            # The timer of a batch already flushed for being full is a no-op
+            if self._pending.get(key) is not batch:
+                return
+            del self._pending[key]
+        
+        task = key[0].create_task(self._run_batch(key, batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+    
+    async def _run_batch(self, key: Tuple, batch: List[Tuple[str, Optional[List[float]], asyncio.Future]]):
+        _, user_role, department, k = key
+        try:
+            results = await self.ingestion_pipeline.batch_search_documents(
+                [query for query, _, _ in batch],
+                user_role=user_role,
+                department=department,
+                k=k,
+                query_embeddings=[embedding for _, embedding, _ in batch]
+            )
+        except Exception as e:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        for (_, _, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+
 class DocumentRetrievalTool(BaseTool):
     """Tool for retrieving relevant documents from vector store"""
     
@@ -56,17 +466,18 @@ class DocumentRetrievalTool(BaseTool):
     Input should be a search query describing what information you're looking for.
     """
     
-    def __init__(self, ingestion_pipeline: DocumentIngestionPipeline, user_role: str, department: str = None):
-        super().__init__()
-        self.ingestion_pipeline = ingestion_pipeline
-        self.user_role = user_role
-        self.department = department
+    retriever: BatchingRetriever
+    user_role: str
+    department: Optional[str] = None
+    
+    class Config:
+        arbitrary_types_allowed = True
     
     async def _arun(self, query: str) -> str:
         """Async implementation of document retrieval"""
         try:
-            results = await self.ingestion_pipeline.search_documents(
-                query=query,
+            results = await self.retriever.search(
+                query,
                 user_role=self.user_role,
                 department=self.department,
                 k=settings.TOP_K_RETRIEVAL
@@ -76,27 +487,14 @@ class DocumentRetrievalTool(BaseTool):
                 return "No relevant documents found in the knowledge base."
             
             # Format results for the agent
-            formatted_results = []
-            for i, result in enumerate(results, 1):
-                content = result['content'][:500] + "..." if len(result['content']) > 500 else result['content']
-                metadata = result.get('metadata', {})
-                
-                formatted_results.append(f"""
-Document {i}:
-Content: {content}
-Source: {metadata.get('file_name', 'Unknown')}
-Department: {metadata.get('department', 'General')}
-Relevance Score: {1 - result.get('distance', 0):.2f}
-""")
-            
-            return "\n".join(formatted_results)
+            return _format_document_results(results)
             
         except Exception as e:
             return f"Error retrieving documents: {str(e)}"
     
     def _run(self, query: str) -> str:
         """Sync wrapper for async implementation"""
-        return asyncio.run(self._arun(query))
+        return _run_sync(self._arun(query))
 
 
 class WebSearchTool(BaseTool):
@@ -110,43 +508,77 @@ class WebSearchTool(BaseTool):
     Input should be a search query.
     """
     
-    def __init__(self):
-        super().__init__()
-        self.tavily_client = TavilyClient(api_key=settings.TAVILY_API_KEY) if settings.TAVILY_API_KEY else None
+    # Set for sensitive queries that must not be kept in the shared result cache
+    no_cache: bool = False
     
     async def _arun(self, query: str) -> str:
         """Async implementation of web search"""
-        if not self.tavily_client:
+        if not settings.TAVILY_API_KEY:
             return "Web search is not available. Please configure TAVILY_API_KEY."
         
+        cached = None if self.no_cache else _web_search_cache.get(query)
+        if cached is not None:
+            return cached
+        
         try:
-            response = self.tavily_client.search(
-                query=query,
-                search_depth="advanced",
-                max_results=3
-            )
+            payload = {
+                "api_key": settings.TAVILY_API_KEY,
+                "query": query,
+                "search_depth": "advanced",
+                "max_results": 3
+            }
+            http_response = await _get_http_client().post(TAVILY_SEARCH_URL, json=payload, timeout=20)
+            http_response.raise_for_status()
+            response = http_response.json()
             
             if not response.get('results'):
                 return "No relevant web results found."
             
             # Format results
-            formatted_results = []
-            for i, result in enumerate(response['results'], 1):
-                formatted_results.append(f"""
-Web Result {i}:
-Title: {result.get('title', 'No title')}
-Content: {result.get('content', 'No content')[:400]}...
-URL: {result.get('url', 'No URL')}
-""")
-            
-            return "\n".join(formatted_results)
+            formatted = _format_web_results(response['results'])
+            if not self.no_cache:
+                _web_search_cache.set(query, formatted)
+            return formatted
             
         except Exception as e:
             return f"Error performing web search: {str(e)}"
     
     def _run(self, query: str) -> str:
         """Sync wrapper for async implementation"""
-        return asyncio.run(self._arun(query))
+        return _run_sync(self._arun(query))
+
+
+class ParallelSearchTool(BaseTool):
+    """Tool that queries internal documents and the web concurrently"""
+    
+    name = "parallel_search"
+    description = """
+    Search internal company documents and the web at the same time.
+    Use this tool when answering likely needs both internal knowledge and current external information.
+    Input should be a search query.
+    """
+    
+    doc_tool: DocumentRetrievalTool
+    web_tool: WebSearchTool
+    
+    async def _arun(self, query: str) -> str:
+        """Async implementation running both searches under asyncio.gather"""
+        doc, web = await asyncio.gather(
+            self.doc_tool._arun(query),
+            self.web_tool._arun(query),
+            return_exceptions=True
+        )
+        
+        if isinstance(doc, Exception):
+            doc = f"Error retrieving documents: {str(doc)}"
+        if isinstance(web, Exception):
+            web = f"Error performing web search: {str(web)}"
+        
+        return f"=== INTERNAL ===\n{doc}\n=== WEB ===\n{web}"
+    
+    def _run(self, query: str) -> str:
+        """Sync wrapper for async implementation"""
+        return _run_sync(self._arun(query))
 
 
 class KnowledgeAnalysisTool(BaseTool):
@@ -159,14 +591,14 @@ class KnowledgeAnalysisTool(BaseTool):
     Input should be the information to analyze and the original question.
     """
     
-    def __init__(self, llm: ChatOpenAI):
-        super().__init__()
-        self.llm = llm
+    llm: Any  # ChatOpenAI, or FakeListLLM when no OpenAI key is configured
     
-    async def _arun(self, analysis_input: str) -> str:
-        """Async implementation of knowledge analysis"""
-        try:
-            analysis_prompt = f"""
+    class Config:
+        arbitrary_types_allowed = True
+    
+    @staticmethod
+    def _analysis_prompt(analysis_input: str) -> str:
+        return f"""
             Analyze the following information and provide a comprehensive, accurate answer:
             
             {analysis_input}
@@ -178,16 +610,28 @@ class KnowledgeAnalysisTool(BaseTool):
             4. Cite sources when possible
             5. Note any limitations or uncertainties
             """
-            
-            response = await self.llm.ainvoke(analysis_prompt)
+    
+    async def _arun(self, analysis_input: str) -> str:
+        """Async implementation of knowledge analysis"""
+        try:
+            response = await self.llm.ainvoke(self._analysis_prompt(analysis_input))
             return response.content
             
         except Exception as e:
             return f"Error analyzing information: {str(e)}"
     
     def _run(self, analysis_input: str) -> str:
-        """Sync wrapper for async implementation"""
-        return asyncio.run(self._arun(analysis_input))
+        """Sync implementation of knowledge analysis
+        
+        Uses the LLM's sync client: its async client shares the application
+        loop's HTTP pool and cannot be driven from the background tool loop.
+        """
+        try:
+            response = self.llm.invoke(self._analysis_prompt(analysis_input))
+            return response.content
+            
+        except Exception as e:
+            return f"Error analyzing information: {str(e)}"
 
 
 class AgenticRAGPipeline:
@@ -198,17 +642,43 @@ class AgenticRAGPipeline:
         self.llm = self._initialize_llm()
         
         self.ingestion_pipeline = DocumentIngestionPipeline()
+        self.retriever = BatchingRetriever(self.ingestion_pipeline)
         self.callback_handler = LangSmithCallbackHandler()
         
-        # Memory for conversation context
-        self.memory = ConversationBufferWindowMemory(
-            k=5,
-            memory_key="chat_history",
-            return_messages=True
+        # Tools that do not depend on role or department are shared by all executors
+        self._knowledge_tool = KnowledgeAnalysisTool(llm=self.llm)
+        self._web_tool = WebSearchTool()
+        self._uncached_web_tool = WebSearchTool(no_cache=True)
+        
+        # Conversation context per session, as (message, token count, ISO timestamp)
+        self._sessions: Dict[str, Deque[Tuple[BaseMessage, int, str]]] = defaultdict(
+            lambda: deque(maxlen=settings.CHAT_HISTORY_MAX_MESSAGES)
         )
         
+        # Running summaries of messages that have left each session's window,
+        # as (summary, token count), updated off the request path
+        self.summary_llm = self._initialize_summary_llm()
+        self._summaries: Dict[str, Tuple[str, int]] = {}
+        self._summary_tasks: Dict[str, asyncio.Task] = {}
+        
+        # Sessions idle for longer than CHAT_SESSION_IDLE_SECONDS start over
+        self._last_active: Dict[str, float] = {}
+        
+        # Agent executors are query-independent, so build one per role/department
+        self._executor_cache: "OrderedDict[Tuple[str, Optional[str]], AgentExecutor]" = OrderedDict()
+        
         # Initialize embedding service
         self.embedding_service = get_embedding_service()
+        
+        # Answers to recent queries, matched by embedding similarity
+        self.semantic_cache = SemanticCache(
+            threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+            maxsize=settings.SEMANTIC_CACHE_SIZE,
+            ttl_seconds=settings.SEMANTIC_CACHE_TTL
+        )
+        DocumentIngestionPipeline.add_ingestion_listener(
+            lambda document_id: self.semantic_cache.clear()
+        )
     
     def _initialize_llm(self):
         """Initialize the language model with fallback options"""
@@ -218,7 +688,12 @@ class AgenticRAGPipeline:
                 return ChatOpenAI(
                     model="gpt-4-turbo-preview",
                     temperature=0.1,
-                    openai_api_key=settings.OPENAI_API_KEY
+                    streaming=True,
+                    openai_api_key=settings.OPENAI_API_KEY,
+                    async_client=AsyncOpenAI(
+                        api_key=settings.OPENAI_API_KEY,
+                        http_client=_http_client
+                    ).chat.completions
                 )
             else:
                 logger.warning("OpenAI API key not available. Using fallback LLM configuration.")
@@ -227,6 +702,7 @@ class AgenticRAGPipeline:
                 return ChatOpenAI(
                     model="gpt-3.5-turbo",
                     temperature=0.1,
+                    streaming=True,
                     openai_api_key="dummy-key"  # This will fail gracefully
                 )
         except Exception as e:
@@ -234,6 +710,22 @@ class AgenticRAGPipeline:
             # Return a mock LLM for development/testing
             return self._create_mock_llm()
     
+    def _initialize_summary_llm(self) -> Optional[ChatOpenAI]:
+        """Cheaper model for conversation summaries, or None to drop old turns instead"""
+        if not (settings.OPENAI_API_KEY and settings.CHAT_SUMMARY_MODEL):
+            return None
+        
+        return ChatOpenAI(
+            model=settings.CHAT_SUMMARY_MODEL,
+            temperature=0,
+            max_tokens=settings.CHAT_SUMMARY_MAX_TOKENS,
+            openai_api_key=settings.OPENAI_API_KEY,
+            async_client=AsyncOpenAI(
+                api_key=settings.OPENAI_API_KEY,
+                http_client=_http_client
+            ).chat.completions
+        )
+    
     def _create_mock_llm(self):
         """Create a mock LLM for testing when no API key is available"""
         from langchain.llms.fake import FakeListLLM
@@ -246,64 +738,45 @@ class AgenticRAGPipeline:
         
         return FakeListLLM(responses=responses)
     
-    def _create_agent_tools(self, user_role: str, department: str = None) -> List[BaseTool]:
+    def _create_agent_tools(self, user_role: str, department: str = None,
+                            no_cache: bool = False) -> List[BaseTool]:
         """Create tools for the agent based on user role"""
+        doc_tool = DocumentRetrievalTool(
+            retriever=self.retriever,
+            user_role=user_role,
+            department=department
+        )
         tools = [
-            DocumentRetrievalTool(self.ingestion_pipeline, user_role, department),
-            KnowledgeAnalysisTool(self.llm)
+            doc_tool,
+            self._knowledge_tool
         ]
         
-        # Add web search tool if API key is available
+        # Add web search tools if API key is available
         if settings.TAVILY_API_KEY:
-            tools.append(WebSearchTool())
+            web_tool = self._get_web_tool(no_cache)
+            tools.append(web_tool)
+            tools.append(ParallelSearchTool(doc_tool=doc_tool, web_tool=web_tool))
         
         return tools
     
+    def _get_web_tool(self, no_cache: bool = False) -> WebSearchTool:
+        """Shared web search tool, bypassing the result cache for sensitive queries"""
+        return self._uncached_web_tool if no_cache else self._web_tool
+    
     def _create_agent_prompt(self, user_role: str) -> ChatPromptTemplate:
-        """Create role-specific agent prompt"""
-        
-        role_context = {
-            "employee": "You are an AI assistant helping an employee. Provide helpful information while respecting access controls.",
-            "manager": "You are an AI assistant helping a manager. You have access to additional management information and can provide strategic insights.",
-            "admin": "You are an AI assistant helping an administrator. You have full access to all information and can provide comprehensive insights."
-        }
-        
-        system_message = f"""
-        {role_context.get(user_role, role_context["employee"])}
-        
-        You have access to the following tools:
-        - document_retrieval: Search internal company documents and knowledge base
-        - web_search: Search the web for current information (if available)
-        - knowledge_analysis: Analyze and synthesize information from multiple sources
-        
-        Guidelines:
-        1. Always try to find information in internal documents first
-        2. Use web search only when internal information is insufficient or outdated
-        3. Provide accurate, well-sourced answers
-        4. Respect role-based access controls
-        5. If you cannot find information, clearly state this
-        6. Synthesize information from multiple sources when needed
-        7. Always cite your sources
-        
-        When answering:
-        - Be concise but comprehensive
-        - Structure your response clearly
-        - Highlight key points
-        - Provide actionable insights when appropriate
-        """
-        
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", system_message),
-            MessagesPlaceholder(variable_name="chat_history"),
-            ("human", "{input}"),
-            MessagesPlaceholder(variable_name="agent_scratchpad")
-        ])
-        
-        return prompt
+        """Return the precompiled role-specific agent prompt"""
+        return _ROLE_PROMPTS.get(user_role) or _ROLE_PROMPTS[UserRole.EMPLOYEE.value]
     
-    async def create_agent_executor(self, user_role: str, department: str = None) -> AgentExecutor:
-        """Create agent executor for the user"""
-        tools = self._create_agent_tools(user_role, department)
+    async def create_agent_executor(self, user_role: str, department: str = None,
+                                    no_cache: bool = False) -> AgentExecutor:
+        """Get or create the agent executor for a role, department and cache mode"""
+        key = (user_role, department, no_cache)
+        executor = self._executor_cache.get(key)
+        if executor is not None:
+            self._executor_cache.move_to_end(key)
+            return executor
+        
+        tools = self._create_agent_tools(user_role, department, no_cache)
         prompt = self._create_agent_prompt(user_role)
         
         # Create agent
@@ -317,40 +790,203 @@ class AgenticRAGPipeline:
         executor = AgentExecutor(
             agent=agent,
             tools=tools,
-            memory=self.memory,
-            verbose=True,
+            verbose=settings.DEBUG,
             max_iterations=5,
+            handle_parsing_errors="Return the answer directly.",
             max_execution_time=60,
             callbacks=[self.callback_handler]
         )
         
+        # No await since the lookup, so concurrent callers cannot interleave here
+        self._executor_cache[key] = executor
+        if len(self._executor_cache) > settings.AGENT_EXECUTOR_CACHE_SIZE:
+            self._executor_cache.popitem(last=False)
+        
         return executor
     
+    def clear_executor_cache(self):
+        """Drop cached agent executors so the next query rebuilds tools and prompts"""
+        self._executor_cache.clear()
+    
+    def _expire_if_idle(self, session_id: str) -> bool:
+        """Clear a session left idle too long; returns True when it has no history"""
+        if session_id not in self._sessions:
+            return True
+        
+        last_active = self._last_active.get(session_id)
+        if last_active is not None and time.monotonic() - last_active > settings.CHAT_SESSION_IDLE_SECONDS:
+            self.clear_conversation_history(session_id)
+            return True
+        return False
+    
+    def _get_chat_history(self, session_id: Optional[str]) -> List[BaseMessage]:
+        """Most recent session messages that fit in the history token budget"""
+        if session_id is None or self._expire_if_idle(session_id):
+            return []
+        
+        history = []
+        budget = settings.CHAT_HISTORY_TOKEN_BUDGET
+        
+        summary = self._summaries.get(session_id)
+        if summary is not None:
+            budget -= summary[1]
+        
+        for message, tokens, _ in reversed(self._sessions[session_id]):
+            budget -= tokens
+            if budget < 0:
+                break
+            history.append(message)
+        
+        if summary is not None:
+            history.append(SystemMessage(content=f"Summary of the earlier conversation: {summary[0]}"))
+        
+        history.reverse()
+        return history
+    
+    def _remember(self, session_id: Optional[str], query: str, answer: str):
+        """Append a question/answer exchange to the session history"""
+        if session_id is None:
+            return
+        
+        session = self._sessions[session_id]
+        messages = (HumanMessage(content=query), AIMessage(content=answer))
+        
+        # Messages about to fall out of the window are folded into the summary
+        overflow = len(session) + len(messages) - session.maxlen
+        if overflow > 0 and self.summary_llm is not None:
+            self._schedule_summary(session_id, [session[i][0] for i in range(overflow)])
+        
+        timestamp = datetime.now().isoformat()
+        for message in messages:
+            session.append((message, _count_tokens(message.content), timestamp))
+        self._last_active[session_id] = time.monotonic()
+    
+    def _schedule_summary(self, session_id: str, evicted: List[BaseMessage]):
+        """Summarize evicted messages in the background, one update at a time per session"""
+        previous = self._summary_tasks.get(session_id)
+        task = asyncio.create_task(self._summarize_evicted(session_id, evicted, previous))
+        self._summary_tasks[session_id] = task
+        
+        def _forget(done: asyncio.Task):
+            if self._summary_tasks.get(session_id) is done:
+                del self._summary_tasks[session_id]
+        
+        task.add_done_callback(_forget)
+    
+    async def _summarize_evicted(self, session_id: str, evicted: List[BaseMessage],
+                                 previous: Optional[asyncio.Task]):
+        """Fold messages that left the session window into its running summary"""
+        if previous is not None:
+            await asyncio.wait([previous])
+        
+        current = self._summaries.get(session_id)
+        prompt = _SUMMARY_TEMPLATE(
+            summary=current[0] if current else "(none)",
+            transcript="\n".join(f"{message.type}: {message.content}" for message in evicted)
+        )
+        try:
+            response = await self.summary_llm.ainvoke(prompt)
+        except Exception:
+            # Keep the previous summary; the evicted turns are simply dropped
+            return
+        
+        # The session may have been cleared while summarizing
+        if session_id in self._sessions:
+            summary = response.content.strip()
+            self._summaries[session_id] = (summary, _count_tokens(summary))
+    
     async def process_query(self, query: str, user_role: str, department: str = None, 
-                          use_web_search: bool = False) -> Dict[str, Any]:
-        """Process a user query through the agentic RAG pipeline"""
-        start_time = datetime.now()
+                          use_web_search: bool = False, session_id: Optional[str] = None,
+                          callbacks: Optional[List[AsyncCallbackHandler]] = None,
+                          no_cache: bool = False) -> Dict[str, Any]:
+        """Process a user query through the agentic RAG pipeline
+        
+        With no_cache, neither the semantic cache nor the web search result
+        cache is read or filled, for queries too sensitive to share.
+        """
+        start = time.perf_counter()
         
         try:
-            # Create agent executor
-            executor = await self.create_agent_executor(user_role, department)
+            chat_history = self._get_chat_history(session_id)
             
-            # Prepare input
-            agent_input = {
-                "input": query,
-                "use_web_search": use_web_search
-            }
+            # Serve semantically equivalent queries from the cache. Follow-ups
+            # in an ongoing conversation depend on it, so they bypass the cache
+            query_embedding = None
+            cache_scope = (user_role, department, use_web_search)
+            use_cache = (
+                settings.SEMANTIC_CACHE_ENABLED
+                and not no_cache
+                and not (chat_history and _is_follow_up(query))
+            )
+            if use_cache:
+                query_embedding = await self.ingestion_pipeline.embedding_service.generate_query_embedding(query)
+                cached = self.semantic_cache.lookup(query_embedding, scope=cache_scope)
+                if cached is not None:
+                    self._remember(session_id, query, cached["answer"])
+                    return {
+                        **cached,
+                        "processing_time": time.perf_counter() - start,
+                        "cache_hit": True
+                    }
             
-            # Execute agent
-            result = await executor.ainvoke(agent_input)
+            # Simple lookups, or any query with confidently relevant documents,
+            # can be answered without agent planning
+            result = None
+            prefetched_steps: List[Tuple[AgentAction, str]] = []
+            if not use_web_search:
+                min_relevance = (
+                    settings.SIMILARITY_THRESHOLD if _classify_query(query) == "simple"
+                    else settings.CONFIDENT_RETRIEVAL_THRESHOLD
+                )
+                result, prefetched_steps = await self._answer_from_retrieval(
+                    query, user_role, department, chat_history, min_relevance,
+                    query_embedding, callbacks
+                )
+            elif settings.TAVILY_API_KEY and not _needs_iterative_reasoning(query):
+                # Straightforward hybrid queries: search both sources at once, then synthesize
+                result = await self._fast_path(
+                    query, user_role, department, chat_history, callbacks, no_cache
+                )
+            
+            if result is None:
+                # Create agent executor
+                executor = await self.create_agent_executor(user_role, department, no_cache)
+                
+                # Prepare input, handing over documents already retrieved above
+                agent_input = {
+                    "input": _PREFETCHED_CONTEXT_TEMPLATE(
+                        query=query,
+                        context="\n\n".join(observation for _, observation in prefetched_steps)
+                    ) if prefetched_steps else query,
+                    "chat_history": chat_history,
+                    "use_web_search": use_web_search
+                }
+                
+                # Execute agent, answering from what it has gathered if it starts looping
+                loop_guard = LoopGuardCallbackHandler()
+                try:
+                    result = await executor.ainvoke(
+                        agent_input,
+                        config={"callbacks": [*(callbacks or ()), loop_guard]}
+                    )
+                    result = {
+                        **result,
+                        "intermediate_steps": [*prefetched_steps, *result.get("intermediate_steps", ())]
+                    }
+                except _RepeatedToolCall:
+                    result = await self._synthesize_answer(
+                        query, user_role, chat_history, [*prefetched_steps, *loop_guard.steps], callbacks
+                    )
             
             # Calculate processing time
-            processing_time = (datetime.now() - start_time).total_seconds()
+            processing_time = time.perf_counter() - start
+            
+            self._remember(session_id, query, result["output"])
             
             # Extract sources from agent execution
             sources = self._extract_sources_from_result(result)
             
-            return {
+            response = {
                 "answer": result["output"],
                 "sources": sources,
                 "confidence_score": self._calculate_confidence_score(result),
@@ -358,11 +994,17 @@ class AgenticRAGPipeline:
                 "user_role": user_role,
                 "department": department,
                 "used_web_search": use_web_search,
-                "status": "success"
+                "status": "success",
+                "cache_hit": False
             }
             
+            if use_cache:
+                self.semantic_cache.put(query_embedding, response, scope=cache_scope)
+            
+            return response
+            
         except Exception as e:
-            processing_time = (datetime.now() - start_time).total_seconds()
+            processing_time = time.perf_counter() - start
             return {
                 "answer": f"I apologize, but I encountered an error processing your query: {str(e)}",
                 "sources": [],
@@ -372,60 +1014,176 @@ class AgenticRAGPipeline:
                 "error": str(e)
             }
     
+    async def _answer_from_retrieval(
+        self,
+        query: str,
+        user_role: str,
+        department: Optional[str],
+        chat_history: List[BaseMessage],
+        min_relevance: float,
+        query_embedding: Optional[List[float]] = None,
+        callbacks: Optional[List[AsyncCallbackHandler]] = None
+    ) -> Tuple[Optional[Dict[str, Any]], List[Tuple[AgentAction, str]]]:
+        """Answer in a single LLM call when retrieval is relevant enough
+        
+        Returns an agent-shaped result ({"output", "intermediate_steps"}), or
+        None when the best match is below min_relevance and the full agent
+        should run instead, together with the retrieval step so the agent
+        does not have to repeat it. A failed search yields (None, []).
+        """
+        try:
+            results = await self.retriever.search(
+                query,
+                user_role=user_role,
+                department=department,
+                k=settings.TOP_K_RETRIEVAL,
+                query_embedding=query_embedding
+            )
+        except Exception as e:
+            # Let the agent retry retrieval and report the error as an observation
+            logger.warning(f"Retrieval pre-check failed: {str(e)}")
+            return None, []
+        
+        observation = (
+            _format_document_results(results) if results
+            else "No relevant documents found in the knowledge base."
+        )
+        steps = [(AgentAction(tool="document_retrieval", tool_input=query, log=""), observation)]
+        
+        relevances = [1 - result['distance'] for result in results if result.get('distance') is not None]
+        if not relevances or max(relevances) < min_relevance:
+            return None, steps
+        
+        return await self._synthesize_answer(query, user_role, chat_history, steps, callbacks), steps
+    
+    async def _fast_path(
+        self,
+        query: str,
+        user_role: str,
+        department: Optional[str],
+        chat_history: List[BaseMessage],
+        callbacks: Optional[List[AsyncCallbackHandler]] = None,
+        no_cache: bool = False
+    ) -> Dict[str, Any]:
+        """Answer a hybrid query with one concurrent doc/web search and one LLM call"""
+        search_tool = ParallelSearchTool(
+            doc_tool=DocumentRetrievalTool(
+                retriever=self.retriever,
+                user_role=user_role,
+                department=department
+            ),
+            web_tool=self._get_web_tool(no_cache)
+        )
+        observation = await search_tool._arun(query)
+        
+        steps = [(AgentAction(tool=search_tool.name, tool_input=query, log=""), observation)]
+        return await self._synthesize_answer(query, user_role, chat_history, steps, callbacks)
+    
+    async def _synthesize_answer(
+        self,
+        query: str,
+        user_role: str,
+        chat_history: List[BaseMessage],
+        steps: List[Tuple[AgentAction, str]],
+        callbacks: Optional[List[AsyncCallbackHandler]] = None
+    ) -> Dict[str, Any]:
+        """Answer in one LLM call from tool observations, as an agent-shaped result"""
+        context = "\n\n".join(observation for _, observation in steps)
+        messages = self._create_agent_prompt(user_role).format_messages(
+            input=_DIRECT_ANSWER_TEMPLATE(context=context, query=query),
+            chat_history=chat_history,
+            agent_scratchpad=[]
+        )
+        response = await self.llm.ainvoke(
+            messages,
+            config={"callbacks": callbacks} if callbacks else None
+        )
+        
+        return {
+            "output": getattr(response, "content", response),
+            "intermediate_steps": steps
+        }
+    
+    async def process_query_stream(self, query: str, user_role: str, department: str = None,
+                                   use_web_search: bool = False,
+                                   session_id: Optional[str] = None,
+                                   no_cache: bool = False) -> AsyncIterator[Union[str, Dict[str, Any]]]:
+        """Process a query, yielding answer tokens as they are generated
+        
+        Yields token strings while the agent runs, then a final
+        {"_final": <process_query result>} dict with sources and scores.
+        """
+        handler = TokenQueueCallbackHandler()
+        task = asyncio.create_task(
+            self.process_query(query, user_role, department, use_web_search,
+                               session_id=session_id, callbacks=[handler], no_cache=no_cache)
+        )
+        task.add_done_callback(lambda _: handler.queue.put_nowait(None))
+        
+        while True:
+            token = await handler.queue.get()
+            if token is None:
+                break
+            yield token
+        
+        yield {"_final": await task}
+    
+    async def process_query_batch(self, queries: List[str], user_role: str, department: str = None,
+                                  use_web_search: bool = False, max_concurrency: int = 10) -> List[Dict[str, Any]]:
+        """Process several queries concurrently, bounded by max_concurrency"""
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def _process_one(query: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.process_query(query, user_role, department, use_web_search)
+        
+        return await asyncio.gather(*[_process_one(query) for query in queries])
+    
     def _extract_sources_from_result(self, result: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Extract source information from agent result"""
         sources = []
         
         # This would be enhanced to properly extract sources from the agent's execution
         # For now, we'll return a placeholder structure
-        if "intermediate_steps" in result:
-            for step in result["intermediate_steps"]:
-                if isinstance(step, tuple) and len(step) == 2:
-                    action, observation = step
-                    if hasattr(action, 'tool') and action.tool == "document_retrieval":
-                        sources.append({
-                            "type": "document",
-                            "content": observation[:200] + "..." if len(observation) > 200 else observation,
-                            "tool_used": action.tool
-                        })
-                    elif hasattr(action, 'tool') and action.tool == "web_search":
-                        sources.append({
-                            "type": "web",
-                            "content": observation[:200] + "..." if len(observation) > 200 else observation,
-                            "tool_used": action.tool
-                        })
+        for action, observation in result.get("intermediate_steps", ()):
+            tool = action.tool
+            source_type = _TOOL_SOURCE_TYPES.get(tool)
+            if source_type is None:
+                continue
+            
+            sources.append({
+                "type": source_type,
+                "content": _truncate(observation, 200),
+                "tool_used": tool
+            })
         
         return sources
     
     def _calculate_confidence_score(self, result: Dict[str, Any]) -> float:
         """Calculate confidence score based on result quality"""
         # Simple heuristic - this could be enhanced with more sophisticated scoring
-        base_score = 0.7
-        
-        # Increase confidence if sources were found
-        if "intermediate_steps" in result and result["intermediate_steps"]:
-            base_score += 0.2
+        steps = result.get("intermediate_steps") or ()
+        output = result.get("output") or ""
         
-        # Increase confidence if answer is substantial
-        if "output" in result and len(result["output"]) > 100:
-            base_score += 0.1
+        # Base 0.7, +0.2 if sources were found, +0.1 if the answer is substantial
+        score = 0.7 + 0.2 * bool(steps) + 0.1 * (len(output) > 100)
         
-        return min(base_score, 1.0)
+        return score if score < 1.0 else 1.0
     
-    async def get_conversation_history(self) -> List[Dict[str, Any]]:
-        """Get conversation history"""
-        messages = self.memory.chat_memory.messages
-        history = []
-        
-        for message in messages:
-            history.append({
+    async def get_conversation_history(self, session_id: str) -> List[Dict[str, Any]]:
+        """Get conversation history for a session"""
+        self._expire_if_idle(session_id)
+        return [
+            {
                 "type": message.__class__.__name__,
                 "content": message.content,
-                "timestamp": datetime.now().isoformat()  # This would be stored properly in production
-            })
-        
-        return history
+                "timestamp": timestamp
+            }
+            for message, _, timestamp in self._sessions.get(session_id, ())
+        ]
     
-    def clear_conversation_history(self):
-        """Clear conversation history"""
-        self.memory.clear()
\ No newline at end of file
+    def clear_conversation_history(self, session_id: str):
+        """Clear conversation history for a session"""
+        self._sessions.pop(session_id, None)
+        self._summaries.pop(session_id, None)
+        self._last_active.pop(session_id, None)
\ No newline at end of file
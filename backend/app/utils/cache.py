@@ -0,0 +1,140 @@
+"""
+In-process caching helpers
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class TTLCache:
+    """Bounded LRU cache whose entries expire after a fixed time-to-live"""
+
+    def __init__(self, maxsize: int = 512, ttl_seconds: float = 300):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        """Return the cached value, or default if missing or expired"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+
+            stored_at, value = entry
+            if time.monotonic() - stored_at > self.ttl_seconds:
+                del self._data[key]
+                return default
+
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any):
+        """Store a value, evicting the least recently used entries when full"""
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        """Drop all cached entries"""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SemanticCache:
+    """Response cache matched on cosine similarity of query embeddings
+
+    Entries are partitioned by scope (e.g. user role and department) so a
+    cached answer is never served across access boundaries.
+    """
+
+    def __init__(self, threshold: float = 0.92, maxsize: int = 256, ttl_seconds: float = 600):
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._scopes: Dict[Hashable, "_ScopeEntries"] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(embedding: Sequence[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def lookup(self, embedding: Sequence[float], scope: Hashable) -> Optional[Any]:
+        """Return the cached value most similar to embedding, if above threshold"""
+        query = self._normalize(embedding)
+
+        with self._lock:
+            entries = self._scopes.get(scope)
+            if entries is None or not entries.values:
+                return None
+
+            entries.evict_expired(self.ttl_seconds)
+            if not entries.values:
+                return None
+
+            similarities = entries.vectors @ query
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.threshold:
+                return None
+
+            entries.last_used[best] = time.monotonic()
+            return entries.values[best]
+
+    def put(self, embedding: Sequence[float], value: Any, scope: Hashable):
+        """Cache a value under the given embedding and scope"""
+        vector = self._normalize(embedding)
+
+        with self._lock:
+            entries = self._scopes.setdefault(scope, _ScopeEntries(vector.shape[0]))
+            entries.evict_expired(self.ttl_seconds)
+
+            if len(entries.values) >= self.maxsize:
+                entries.remove(int(np.argmin(entries.last_used)))
+
+            entries.add(vector, value)
+
+    def clear(self):
+        """Drop all cached entries"""
+        with self._lock:
+            self._scopes.clear()
+
+
+class _ScopeEntries:
+    """Embedding matrix and aligned values for one SemanticCache scope"""
+
+    def __init__(self, dimension: int):
+        self.vectors = np.empty((0, dimension), dtype=np.float32)
+        self.values: List[Any] = []
+        self.stored_at: List[float] = []
+        self.last_used: List[float] = []
+
+    def add(self, vector: np.ndarray, value: Any):
+        now = time.monotonic()
+        self.vectors = np.vstack([self.vectors, vector[np.newaxis, :]])
+        self.values.append(value)
+        self.stored_at.append(now)
+        self.last_used.append(now)
+
+    def remove(self, index: int):
+        self.vectors = np.delete(self.vectors, index, axis=0)
+        del self.values[index]
+        del self.stored_at[index]
+        del self.last_used[index]
+
+    def evict_expired(self, ttl_seconds: float):
+        cutoff = time.monotonic() - ttl_seconds
+        expired = [i for i, stored_at in enumerate(self.stored_at) if stored_at < cutoff]
+        for index in reversed(expired):
+            self.remove(index)
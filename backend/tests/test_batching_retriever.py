@@ -0,0 +1,96 @@
+"""
+Tests for coalescing of concurrent document searches
+"""
+import asyncio
+
+import pytest
+
+from app.services.rag_pipeline import BatchingRetriever
+
+
+class StubIngestionPipeline:
+    """Records batched searches and echoes each query back as its result"""
+
+    def __init__(self, error: Exception = None):
+        self.error = error
+        self.calls = []
+
+    async def batch_search_documents(self, queries, user_role, department=None, k=5, query_embeddings=None):
+        self.calls.append((list(queries), user_role, department, k))
+        if self.error is not None:
+            raise self.error
+        return [[{"content": query}] for query in queries]
+
+
+def make_retriever(pipeline, window: float = 0.05, max_batch: int = 32) -> BatchingRetriever:
+    retriever = BatchingRetriever(pipeline)
+    retriever.window = window
+    retriever.max_batch = max_batch
+    return retriever
+
+
+@pytest.mark.asyncio
+async def test_concurrent_searches_share_one_batch():
+    pipeline = StubIngestionPipeline()
+    retriever = make_retriever(pipeline)
+
+    results = await asyncio.gather(
+        retriever.search("leave policy", user_role="employee"),
+        retriever.search("expense limits", user_role="employee"),
+        retriever.search("travel booking", user_role="employee")
+    )
+
+    assert pipeline.calls == [(["leave policy", "expense limits", "travel booking"], "employee", None, 5)]
+    assert [result[0]["content"] for result in results] == ["leave policy", "expense limits", "travel booking"]
+
+    # Finished batch tasks drop their strong reference
+    await asyncio.sleep(0)
+    assert not retriever._tasks
+
+
+@pytest.mark.asyncio
+async def test_searches_with_different_scopes_are_not_mixed():
+    pipeline = StubIngestionPipeline()
+    retriever = make_retriever(pipeline)
+
+    await asyncio.gather(
+        retriever.search("budget", user_role="employee"),
+        retriever.search("budget", user_role="manager", department="finance")
+    )
+
+    assert sorted(pipeline.calls, key=lambda call: call[1]) == [
+        (["budget"], "employee", None, 5),
+        (["budget"], "manager", "finance", 5)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_full_batch_flushes_without_waiting_for_window():
+    pipeline = StubIngestionPipeline()
+    retriever = make_retriever(pipeline, window=60, max_batch=2)
+
+    results = await asyncio.wait_for(
+        asyncio.gather(
+            retriever.search("first", user_role="employee"),
+            retriever.search("second", user_role="employee")
+        ),
+        timeout=1
+    )
+
+    assert pipeline.calls == [(["first", "second"], "employee", None, 5)]
+    assert [result[0]["content"] for result in results] == ["first", "second"]
+
+
+@pytest.mark.asyncio
+async def test_batch_error_reaches_every_caller():
+    pipeline = StubIngestionPipeline(error=RuntimeError("vector store unavailable"))
+    retriever = make_retriever(pipeline)
+
+    results = await asyncio.gather(
+        retriever.search("leave policy", user_role="employee"),
+        retriever.search("expense limits", user_role="employee"),
+        return_exceptions=True
+    )
+
+    assert len(pipeline.calls) == 1
+    assert all(isinstance(result, RuntimeError) for result in results)
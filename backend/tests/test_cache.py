@@ -0,0 +1,122 @@
+"""
+Tests for the in-process TTL and semantic caches
+"""
+import pytest
+
+from app.utils import cache
+from app.utils.cache import SemanticCache, TTLCache
+
+
+class FakeClock:
+    """Stand-in for the time module whose clock only moves when told to"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(cache, "time", fake)
+    return fake
+
+
+def test_ttl_cache_returns_stored_value():
+    ttl_cache = TTLCache(maxsize=4, ttl_seconds=60)
+    ttl_cache.set("query", "result")
+
+    assert ttl_cache.get("query") == "result"
+    assert ttl_cache.get("missing", "default") == "default"
+
+
+def test_ttl_cache_expires_entries(clock):
+    ttl_cache = TTLCache(maxsize=4, ttl_seconds=60)
+    ttl_cache.set("query", "result")
+
+    clock.advance(59)
+    assert ttl_cache.get("query") == "result"
+
+    clock.advance(2)
+    assert ttl_cache.get("query") is None
+    assert len(ttl_cache) == 0
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    ttl_cache = TTLCache(maxsize=2, ttl_seconds=60)
+    ttl_cache.set("a", 1)
+    ttl_cache.set("b", 2)
+
+    # Reading "a" makes "b" the least recently used entry
+    assert ttl_cache.get("a") == 1
+    ttl_cache.set("c", 3)
+
+    assert ttl_cache.get("b") is None
+    assert ttl_cache.get("a") == 1
+    assert ttl_cache.get("c") == 3
+
+
+def test_semantic_cache_matches_similar_embeddings():
+    semantic_cache = SemanticCache(threshold=0.9)
+    semantic_cache.put([1.0, 0.0, 0.0], "leave policy answer", scope=("employee", None))
+
+    # Cosine similarity is scale-invariant
+    assert semantic_cache.lookup([2.0, 0.1, 0.0], scope=("employee", None)) == "leave policy answer"
+
+
+def test_semantic_cache_respects_threshold():
+    semantic_cache = SemanticCache(threshold=0.9)
+    semantic_cache.put([1.0, 0.0, 0.0], "leave policy answer", scope=("employee", None))
+
+    # cos = 0.8, below the threshold
+    assert semantic_cache.lookup([0.8, 0.6, 0.0], scope=("employee", None)) is None
+
+
+def test_semantic_cache_isolates_scopes():
+    semantic_cache = SemanticCache(threshold=0.9)
+    semantic_cache.put([1.0, 0.0, 0.0], "finance answer", scope=("manager", "finance"))
+
+    assert semantic_cache.lookup([1.0, 0.0, 0.0], scope=("employee", None)) is None
+    assert semantic_cache.lookup([1.0, 0.0, 0.0], scope=("manager", "hr")) is None
+    assert semantic_cache.lookup([1.0, 0.0, 0.0], scope=("manager", "finance")) == "finance answer"
+
+
+def test_semantic_cache_expires_entries(clock):
+    semantic_cache = SemanticCache(threshold=0.9, ttl_seconds=60)
+    semantic_cache.put([1.0, 0.0, 0.0], "answer", scope="employee")
+
+    clock.advance(61)
+    assert semantic_cache.lookup([1.0, 0.0, 0.0], scope="employee") is None
+
+
+def test_semantic_cache_evicts_least_recently_used(clock):
+    semantic_cache = SemanticCache(threshold=0.9, maxsize=2)
+    semantic_cache.put([1.0, 0.0, 0.0], "a", scope="employee")
+    clock.advance(1)
+    semantic_cache.put([0.0, 1.0, 0.0], "b", scope="employee")
+    clock.advance(1)
+
+    # Using "a" leaves "b" as the least recently used entry
+    assert semantic_cache.lookup([1.0, 0.0, 0.0], scope="employee") == "a"
+    clock.advance(1)
+    semantic_cache.put([0.0, 0.0, 1.0], "c", scope="employee")
+
+    assert semantic_cache.lookup([0.0, 1.0, 0.0], scope="employee") is None
+    assert semantic_cache.lookup([1.0, 0.0, 0.0], scope="employee") == "a"
+    assert semantic_cache.lookup([0.0, 0.0, 1.0], scope="employee") == "c"
+
+
+def test_semantic_cache_clear_drops_every_scope():
+    semantic_cache = SemanticCache(threshold=0.9)
+    semantic_cache.put([1.0, 0.0, 0.0], "answer", scope="employee")
+    semantic_cache.put([1.0, 0.0, 0.0], "answer", scope="manager")
+
+    semantic_cache.clear()
+
+    assert semantic_cache.lookup([1.0, 0.0, 0.0], scope="employee") is None
+    assert semantic_cache.lookup([1.0, 0.0, 0.0], scope="manager") is None
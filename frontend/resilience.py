@@ -0,0 +1,94 @@
+"""
+Failure handling shared by the frontend's API client
+"""
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable
+
+import requests
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """Raised instead of calling an endpoint that has been failing"""
+
+
+class CircuitBreaker:
+    """Stops calling an endpoint for a cooldown after consecutive failures
+    
+    Once the cooldown is over a single probe call is let through; its
+    outcome closes the circuit or restarts the cooldown.
+    """
+    
+    def __init__(self, failure_threshold: int = 3, reset_seconds: float = 30):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._failures: Dict[str, int] = {}
+        self._opened_at: Dict[str, float] = {}
+        self._probing: set = set()
+        self._lock = threading.Lock()
+    
+    def check(self, endpoint: str):
+        """Raise CircuitOpenError while the endpoint's circuit is open"""
+        with self._lock:
+            opened_at = self._opened_at.get(endpoint)
+            if opened_at is None:
+                return
+            if time.monotonic() - opened_at < self.reset_seconds or endpoint in self._probing:
+                raise CircuitOpenError(f"{endpoint} is temporarily unavailable after repeated failures")
+            # Cooldown over: this call is the probe, everyone else keeps failing fast
+            self._probing.add(endpoint)
+    
+    def record_success(self, endpoint: str):
+        with self._lock:
+            self._failures.pop(endpoint, None)
+            self._opened_at.pop(endpoint, None)
+            self._probing.discard(endpoint)
+    
+    def record_failure(self, endpoint: str):
+        with self._lock:
+            if endpoint in self._probing:
+                self._probing.discard(endpoint)
+                self._opened_at[endpoint] = time.monotonic()
+                return
+            
+            failures = self._failures.get(endpoint, 0) + 1
+            self._failures[endpoint] = failures
+            if failures >= self.failure_threshold:
+                self._opened_at[endpoint] = time.monotonic()
+    
+    def release(self, endpoint: str):
+        """End a call that neither proves nor disproves the endpoint is up"""
+        with self._lock:
+            self._probing.discard(endpoint)
+
+
+class SingleFlight:
+    """Shares one in-flight call between concurrent callers with the same key"""
+    
+    def __init__(self):
+        self._inflight: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+    
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Run fn, or wait for the result of an identical call already running"""
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+        
+        if not leader:
+            return future.result()
+        
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._inflight[key]
@@ -3,16 +3,37 @@ Streamlit frontend for AI Knowledge Assistant
 """
 import streamlit as st
 import requests
+from requests.adapters import HTTPAdapter
+from requests_toolbelt.multipart.encoder import MultipartEncoder
+from urllib3.util.retry import Retry
 import json
+import logging
+import threading
 import time
-from typing import Dict, Any, Optional
-import pandas as pd
+from collections import OrderedDict, deque
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+from http.cookiejar import DefaultCookiePolicy
+from typing import Dict, Any, Hashable, Optional
 from datetime import datetime
-import plotly.express as px
-import plotly.graph_objects as go
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+from resilience import CircuitBreaker, SingleFlight
+
+logger = logging.getLogger(__name__)
 
 # Configuration
 API_BASE_URL = "http://localhost:8000"
+# (connect, read) timeouts in seconds; queries wait for the LLM, uploads for indexing
+DEFAULT_TIMEOUT = (3.05, 30)
+QUERY_TIMEOUT = (3.05, 90)
+LONG_TIMEOUT = (3.05, 120)
+GATEWAY_ERROR_STATUSES = (502, 503, 504)  # the backend itself is down or overloaded
+CHAT_HISTORY_LIMIT = 50  # messages kept per session
+CHAT_DISPLAY_LIMIT = 10  # most recent messages shown; older ones drop their sources
+STATUS_ETAG_CACHE_SIZE = 128  # users whose last system status is kept for revalidation
+STATUS_ETAG_TTL = 900  # seconds before a remembered status is dropped
 
 # Page configuration
 st.set_page_config(
@@ -33,22 +54,6 @@ st.markdown("""
         margin-bottom: 2rem;
     }
     
-    .chat-message {
-        padding: 1rem;
-        border-radius: 0.5rem;
-        margin: 0.5rem 0;
-    }
-    
-    .user-message {
-        background-color: #e3f2fd;
-        border-left: 4px solid #2196f3;
-    }
-    
-    .assistant-message {
-        background-color: #f3e5f5;
-        border-left: 4px solid #9c27b0;
-    }
-    
     .metric-card {
         background-color: #f8f9fa;
         padding: 1rem;
@@ -75,22 +80,96 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
+def _single_flight(method):
+    """Deduplicate concurrent calls of a read-only APIClient method per user token"""
+    @wraps(method)
+    def wrapper(self, token: Optional[str] = None):
+        token = token or st.session_state.get("auth_token")
+        return self.single_flight.do((method.__name__, token), lambda: method(self, token=token))
+    return wrapper
+
+
 class APIClient:
     """Client for interacting with the FastAPI backend"""
     
     def __init__(self, base_url: str):
         self.base_url = base_url
         self.session = requests.Session()
+        
+        # Keep connections to the backend open across calls; retry idempotent
+        # requests (not POSTs) on transient gateway errors. Read errors are
+        # never retried so a call is bounded by its own timeout
+        adapter = HTTPAdapter(
+            pool_connections=20,
+            pool_maxsize=50,
+            max_retries=Retry(
+                total=3,
+                connect=1,
+                read=False,
+                backoff_factor=0.2,
+                status_forcelist=GATEWAY_ERROR_STATUSES
+            )
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers["Connection"] = "keep-alive"
+        
+        # The session is shared by all users, so never keep per-user cookies on it
+        self.session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        
+        self.circuit_breaker = CircuitBreaker()
+        self.single_flight = SingleFlight()
+        
+        # Last system status ETag, body and fetch time per user token, for
+        # conditional GETs; bounded LRU since the client outlives sessions
+        self._status_etags: "OrderedDict[str, tuple]" = OrderedDict()
+        self._status_lock = threading.Lock()
     
-    def set_auth_token(self, token: str):
-        """Set authentication token"""
-        self.session.headers.update({"Authorization": f"Bearer {token}"})
+    def _request(self, method: str, path: str, timeout=DEFAULT_TIMEOUT, **kwargs) -> requests.Response:
+        """Send a request with a timeout, failing fast while the endpoint is down
+        
+        The client and its breaker are shared by all sessions, so only
+        signs that the backend itself is down count as failures: connection
+        errors and gateway errors (502/503/504). Other 5xx responses come
+        from a single request, such as a failed LLM call, and like read
+        timeouts neither open nor close the circuit.
+        """
+        self.circuit_breaker.check(path)
+        healthy = None
+        try:
+            response = self.session.request(method, f"{self.base_url}{path}", timeout=timeout, **kwargs)
+            if response.status_code in GATEWAY_ERROR_STATUSES:
+                healthy = False
+            elif response.status_code < 500:
+                healthy = True
+            return response
+        except (requests.exceptions.ConnectionError, requests.exceptions.RetryError):
+            healthy = False
+            raise
+        finally:
+            # Runs for any exception too, so a probe slot is never left taken
+            if healthy is None:
+                self.circuit_breaker.release(path)
+            elif healthy:
+                self.circuit_breaker.record_success(path)
+            else:
+                self.circuit_breaker.record_failure(path)
+    
+    def _auth_headers(self, token: Optional[str] = None) -> Dict[str, str]:
+        """Authorization header for the current user's session
+        
+        The client is shared by all users, so the token is read per call
+        instead of being set on the session.
+        """
+        token = token or st.session_state.get("auth_token")
+        return {"Authorization": f"Bearer {token}"} if token else {}
     
     def login(self, username: str, password: str) -> Dict[str, Any]:
         """Login user"""
         try:
-            response = self.session.post(
-                f"{self.base_url}/auth/login",
+            response = self._request(
+                "POST",
+                "/auth/login",
                 data={"username": username, "password": password}
             )
             response.raise_for_status()
@@ -101,8 +180,9 @@ class APIClient:
     def register(self, user_data: Dict[str, Any]) -> Dict[str, Any]:
         """Register new user"""
         try:
-            response = self.session.post(
-                f"{self.base_url}/auth/register",
+            response = self._request(
+                "POST",
+                "/auth/register",
                 json=user_data
             )
             response.raise_for_status()
@@ -113,7 +193,7 @@ class APIClient:
     def get_current_user(self) -> Dict[str, Any]:
         """Get current user info"""
         try:
-            response = self.session.get(f"{self.base_url}/auth/me")
+            response = self._request("GET", "/auth/me", headers=self._auth_headers())
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
@@ -122,77 +202,254 @@ class APIClient:
     def query_assistant(self, query: str, use_web_search: bool = False) -> Dict[str, Any]:
         """Query the AI assistant"""
         try:
-            response = self.session.post(
-                f"{self.base_url}/api/v1/query/ask",
+            response = self._request(
+                "POST",
+                "/api/v1/query/ask",
+                timeout=QUERY_TIMEOUT,
                 json={
                     "query": query,
                     "use_web_search": use_web_search,
                     "max_results": 5
-                }
+                },
+                headers=self._auth_headers()
             )
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
             return {"error": str(e)}
     
+    def clear_conversation_history(self, token: Optional[str] = None) -> Dict[str, Any]:
+        """Clear the conversation context the backend keeps for the current user"""
+        try:
+            response = self._request("DELETE", "/api/v1/query/history", headers=self._auth_headers(token))
+            response.raise_for_status()
+            return response.json()
+        except requests.exceptions.RequestException as e:
+            return {"error": str(e)}
+    
     def upload_document(self, file, title: str, access_level: str = "employee", department: str = None) -> Dict[str, Any]:
         """Upload a document"""
         try:
-            files = {"file": file}
-            data = {
+            fields = {
                 "title": title,
                 "access_level": access_level,
-                "department": department
+                "file": (file.name, file, file.type or "application/octet-stream")
             }
-            response = self.session.post(
-                f"{self.base_url}/api/v1/documents/upload",
-                files=files,
-                data=data
+            if department:
+                fields["department"] = department
+            
+            # Stream the file in chunks instead of building the whole body in memory
+            encoder = MultipartEncoder(fields=fields)
+            response = self._request(
+                "POST",
+                "/api/v1/documents/upload",
+                timeout=LONG_TIMEOUT,
+                data=encoder,
+                headers={**self._auth_headers(), "Content-Type": encoder.content_type}
             )
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
             return {"error": str(e)}
     
-    def list_documents(self) -> Dict[str, Any]:
+    @_single_flight
+    def list_documents(self, token: Optional[str] = None) -> Dict[str, Any]:
         """List accessible documents"""
         try:
-            response = self.session.get(f"{self.base_url}/api/v1/documents/")
+            response = self._request("GET", "/api/v1/documents/", headers=self._auth_headers(token))
+            response.raise_for_status()
+            return response.json()
+        except requests.exceptions.RequestException as e:
+            return {"error": str(e)}
+    
+    @_single_flight
+    def get_system_status(self, token: Optional[str] = None) -> Dict[str, Any]:
+        """Get system status (manager/admin only)
+        
+        Revalidates with the last ETag, so an unchanged status costs a
+        bodyless 304 instead of a full response.
+        """
+        token = token or st.session_state.get("auth_token")
+        headers = self._auth_headers(token)
+        
+        with self._status_lock:
+            cached = self._status_etags.get(token)
+            if cached and time.monotonic() - cached[2] > STATUS_ETAG_TTL:
+                del self._status_etags[token]
+                cached = None
+            elif cached:
+                self._status_etags.move_to_end(token)
+        if cached:
+            headers["If-None-Match"] = cached[0]
+        
+        try:
+            response = self._request("GET", "/api/v1/admin/system/status", headers=headers)
+            if response.status_code == 304 and cached:
+                return cached[1]
+            response.raise_for_status()
+            result = response.json()
+        except requests.exceptions.RequestException as e:
+            return {"error": str(e)}
+        
+        etag = response.headers.get("ETag")
+        if etag:
+            with self._status_lock:
+                self._status_etags[token] = (etag, result, time.monotonic())
+                self._status_etags.move_to_end(token)
+                while len(self._status_etags) > STATUS_ETAG_CACHE_SIZE:
+                    self._status_etags.popitem(last=False)
+        return result
+    
+    @_single_flight
+    def get_analytics(self, token: Optional[str] = None) -> Dict[str, Any]:
+        """Get system analytics (manager/admin only)"""
+        try:
+            response = self._request("GET", "/api/v1/admin/analytics", headers=self._auth_headers(token))
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
             return {"error": str(e)}
     
-    def get_system_status(self) -> Dict[str, Any]:
-        """Get system status (manager/admin only)"""
+    def get_embedding_models(self) -> Dict[str, Any]:
+        """Get available embedding models (admin only)"""
         try:
-            response = self.session.get(f"{self.base_url}/api/v1/admin/system/status")
+            response = self._request(
+                "GET",
+                "/api/v1/admin/embedding-models",
+                headers=self._auth_headers()
+            )
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
             return {"error": str(e)}
     
-    def get_analytics(self) -> Dict[str, Any]:
-        """Get system analytics (manager/admin only)"""
+    def benchmark_embedding_model(self) -> Dict[str, Any]:
+        """Benchmark the current embedding model (admin only)"""
         try:
-            response = self.session.get(f"{self.base_url}/api/v1/admin/analytics")
+            response = self._request(
+                "GET",
+                "/api/v1/admin/embedding-models/benchmark",
+                timeout=LONG_TIMEOUT,
+                headers=self._auth_headers()
+            )
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
             return {"error": str(e)}
 
 
-# Initialize API client
-if "api_client" not in st.session_state:
-    st.session_state.api_client = APIClient(API_BASE_URL)
+@st.cache_resource
+def get_api_client() -> APIClient:
+    """API client shared by all sessions, so its connection pool stays warm"""
+    return APIClient(API_BASE_URL)
+
+
+class _UncachedAPIError(Exception):
+    """Carries an error result out of a cached call so it is not cached"""
+    
+    def __init__(self, result: Dict[str, Any]):
+        super().__init__(result["error"])
+        self.result = result
+
+
+class _CacheGenerations:
+    """Counters folded into cache keys, so single entries can be invalidated
+    
+    st.cache_data can only be cleared as a whole; bumping a counter instead
+    makes the next call miss for just that endpoint, or endpoint and user.
+    """
+    
+    def __init__(self):
+        self._counters: Dict[Hashable, int] = {}
+        self._lock = threading.Lock()
+    
+    def get(self, key: Hashable) -> int:
+        return self._counters.get(key, 0)
+    
+    def bump(self, key: Hashable):
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+
+
+@st.cache_resource
+def _cache_generations() -> _CacheGenerations:
+    return _CacheGenerations()
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _cached_api_get(method_name: str, token: Optional[str], generation: tuple) -> Any:
+    result = getattr(get_api_client(), method_name)(token=token)
+    if isinstance(result, dict) and "error" in result:
+        raise _UncachedAPIError(result)
+    return result
+
+
+def fetch_cached(method_name: str, token: Optional[str] = None, force: bool = False) -> Any:
+    """Call a read-only APIClient method, reusing its result for 30s per user token
+    
+    force refetches and recaches this user's entry without touching others.
+    """
+    token = token or st.session_state.auth_token
+    generations = _cache_generations()
+    if force:
+        generations.bump((method_name, token))
+    
+    try:
+        return _cached_api_get(
+            method_name,
+            token,
+            (generations.get(method_name), generations.get((method_name, token)))
+        )
+    except _UncachedAPIError as e:
+        return e.result
+
+
+def prefetch_dashboard_data():
+    """Warm the cache for all dashboard endpoints with concurrent requests
+    
+    Runs once per login. The pages then read their data from the cache, and
+    switching between them does not wait on the backend again.
+    """
+    token = st.session_state.auth_token
+    if st.session_state.get("prefetched_token") == token:
+        return
+    st.session_state.prefetched_token = token
+    
+    method_names = ("get_system_status", "get_analytics", "list_documents")
+    
+    # Worker threads need the script context to use st.cache_data
+    with ThreadPoolExecutor(
+        max_workers=len(method_names),
+        initializer=add_script_run_ctx,
+        initargs=(None, get_script_run_ctx())
+    ) as executor:
+        futures = {
+            executor.submit(fetch_cached, method_name, token): method_name
+            for method_name in method_names
+        }
+    
+    for future, method_name in futures.items():
+        try:
+            future.result()
+        except Exception:
+            # The page will fetch and report on its own when it is opened
+            logger.exception("Prefetching %s failed", method_name)
+
+
+def invalidate_cached_api_data(method_name: str):
+    """Drop every user's cached response of one endpoint, e.g. after an upload"""
+    _cache_generations().bump(method_name)
+
 
 # Initialize session state
+if "auth_token" not in st.session_state:
+    st.session_state.auth_token = None
 if "authenticated" not in st.session_state:
     st.session_state.authenticated = False
 if "user_info" not in st.session_state:
     st.session_state.user_info = None
 if "chat_history" not in st.session_state:
-    st.session_state.chat_history = []
+    st.session_state.chat_history = deque(maxlen=CHAT_HISTORY_LIMIT)
 
 
 def login_page():
@@ -212,14 +469,14 @@ def login_page():
             if submitted:
                 if username and password:
                     with st.spinner("Logging in..."):
-                        result = st.session_state.api_client.login(username, password)
+                        result = get_api_client().login(username, password)
                     
                     if "error" not in result:
-                        st.session_state.api_client.set_auth_token(result["access_token"])
+                        st.session_state.auth_token = result["access_token"]
                         st.session_state.authenticated = True
                         
-                        # Get user info
-                        user_info = st.session_state.api_client.get_current_user()
+                        # Login returns the user's profile; older backends need a second call
+                        user_info = result.get("user") or get_api_client().get_current_user()
                         if "error" not in user_info:
                             st.session_state.user_info = user_info
                         
@@ -254,7 +511,7 @@ def login_page():
                         }
                         
                         with st.spinner("Creating account..."):
-                            result = st.session_state.api_client.register(user_data)
+                            result = get_api_client().register(user_data)
                         
                         if "error" not in result:
                             st.success("Account created successfully! Please login.")
@@ -272,9 +529,11 @@ def main_app():
         st.markdown(f"**Role:** {st.session_state.user_info['role'].title()}")
         
         if st.button("Logout"):
+            get_api_client().clear_conversation_history()
             st.session_state.authenticated = False
+            st.session_state.auth_token = None
             st.session_state.user_info = None
-            st.session_state.chat_history = []
+            st.session_state.chat_history.clear()
             st.rerun()
         
         st.markdown("---")
@@ -285,6 +544,10 @@ def main_app():
             ["Chat Assistant", "Document Management", "System Status", "Analytics"]
         )
     
+    # Managers and admins see all three dashboard pages, so load them together
+    if page != "Chat Assistant" and st.session_state.user_info.get('role') in ['manager', 'admin']:
+        prefetch_dashboard_data()
+    
     # Main content based on selected page
     if page == "Chat Assistant":
         chat_interface()
@@ -296,6 +559,29 @@ def main_app():
         analytics_dashboard()
 
 
+def _format_footer(message: Dict[str, Any]) -> str:
+    """Caption under a chat message (time, plus scores for assistant replies)"""
+    if message["type"] == "user":
+        return message["time"]
+    
+    return (
+        f"Confidence: {message.get('confidence_score', 0):.2f} | "
+        f"Processing time: {message.get('processing_time', 0):.2f}s | {message['time']}"
+    )
+
+
+def _add_chat_message(message: Dict[str, Any]):
+    """Append a message to the chat history with its footer pre-formatted"""
+    message["footer"] = _format_footer(message)
+    st.session_state.chat_history.append(message)
+
+
+def _submit_chat_query():
+    """Send button callback: queue the typed query and clear the input"""
+    st.session_state.pending_query = st.session_state.chat_input
+    st.session_state.chat_input = ""
+
+
 def chat_interface():
     """Chat interface for the AI assistant"""
     st.markdown('<h1 class="main-header">💬 AI Knowledge Assistant</h1>', unsafe_allow_html=True)
@@ -304,62 +590,57 @@ def chat_interface():
     col1, col2 = st.columns([4, 1])
     
     with col1:
-        user_query = st.text_input("Ask me anything about your organization's knowledge base:", key="chat_input")
+        st.text_input("Ask me anything about your organization's knowledge base:", key="chat_input")
     
     with col2:
         use_web_search = st.checkbox("Include web search", value=False)
     
-    if st.button("Send", type="primary") or user_query:
-        if user_query:
-            # Add user message to chat history
-            st.session_state.chat_history.append({
-                "type": "user",
-                "content": user_query,
-                "timestamp": datetime.now()
+    # Only an explicit click submits; the callback hands the query over once
+    # and clears the input before it is redrawn
+    st.button("Send", type="primary", on_click=_submit_chat_query)
+    user_query = st.session_state.pop("pending_query", None)
+    
+    if user_query:
+        # Add user message to chat history
+        _add_chat_message({
+            "type": "user",
+            "content": user_query,
+            "time": datetime.now().strftime("%H:%M:%S")
+        })
+        
+        # Query the assistant
+        with st.spinner("Thinking..."):
+            response = get_api_client().query_assistant(user_query, use_web_search)
+        
+        if "error" not in response:
+            # Add assistant response to chat history
+            _add_chat_message({
+                "type": "assistant",
+                "content": response["answer"],
+                "sources": response.get("sources", []),
+                "confidence_score": response.get("confidence_score", 0),
+                "processing_time": response.get("processing_time", 0),
+                "time": datetime.now().strftime("%H:%M:%S")
             })
             
-            # Query the assistant
-            with st.spinner("Thinking..."):
-                response = st.session_state.api_client.query_assistant(user_query, use_web_search)
-            
-            if "error" not in response:
-                # Add assistant response to chat history
-                st.session_state.chat_history.append({
-                    "type": "assistant",
-                    "content": response["answer"],
-                    "sources": response.get("sources", []),
-                    "confidence_score": response.get("confidence_score", 0),
-                    "processing_time": response.get("processing_time", 0),
-                    "timestamp": datetime.now()
-                })
-            else:
-                st.error(f"Error: {response['error']}")
-            
-            # Clear input
-            st.session_state.chat_input = ""
-            st.rerun()
+            # Sources are only shown for displayed messages, so free them once scrolled out
+            history = st.session_state.chat_history
+            for message in islice(history, max(len(history) - CHAT_DISPLAY_LIMIT, 0)):
+                if message.get("sources"):
+                    message["sources"] = []
+        else:
+            st.error(f"Error: {response['error']}")
+        
+        st.rerun()
     
     # Display chat history
     if st.session_state.chat_history:
         st.markdown("### Conversation")
         
-        for message in reversed(st.session_state.chat_history[-10:]):  # Show last 10 messages
-            if message["type"] == "user":
-                st.markdown(f"""
-                <div class="chat-message user-message">
-                    <strong>You:</strong> {message["content"]}
-                    <br><small>{message["timestamp"].strftime("%H:%M:%S")}</small>
-                </div>
-                """, unsafe_allow_html=True)
-            else:
-                st.markdown(f"""
-                <div class="chat-message assistant-message">
-                    <strong>Assistant:</strong> {message["content"]}
-                    <br><small>Confidence: {message.get("confidence_score", 0):.2f} | 
-                    Processing time: {message.get("processing_time", 0):.2f}s | 
-                    {message["timestamp"].strftime("%H:%M:%S")}</small>
-                </div>
-                """, unsafe_allow_html=True)
+        for message in islice(reversed(st.session_state.chat_history), CHAT_DISPLAY_LIMIT):
+            with st.chat_message("user" if message["type"] == "user" else "assistant"):
+                st.markdown(message["content"])
+                st.caption(message["footer"])
                 
                 # Show sources if available
                 if message.get("sources"):
@@ -369,7 +650,8 @@ def chat_interface():
                             st.markdown(f"Content: {source.get('content', 'No content')[:200]}...")
         
         if st.button("Clear Chat History"):
-            st.session_state.chat_history = []
+            get_api_client().clear_conversation_history()
+            st.session_state.chat_history.clear()
             st.rerun()
 
 
@@ -399,11 +681,12 @@ def document_management():
             
             if st.button("Upload Document", type="primary"):
                 with st.spinner("Uploading and processing document..."):
-                    result = st.session_state.api_client.upload_document(
+                    result = get_api_client().upload_document(
                         uploaded_file, title, access_level, department
                     )
                 
                 if "error" not in result:
+                    invalidate_cached_api_data("list_documents")
                     st.success(f"Document uploaded successfully! Processing status: {result['status']}")
                     if result.get('processing_info'):
                         st.json(result['processing_info'])
@@ -415,20 +698,18 @@ def document_management():
     # Document list
     st.markdown("### Your Documents")
     
-    documents = st.session_state.api_client.list_documents()
+    documents = fetch_cached("list_documents")
     
     if "error" not in documents:
         if documents:
-            df = pd.DataFrame(documents)
-            
             # Display as a nice table
-            for _, doc in df.iterrows():
+            for doc in documents:
                 with st.expander(f"📄 {doc['title']}"):
                     col1, col2, col3 = st.columns(3)
                     
                     with col1:
                         st.markdown(f"**Access Level:** {doc['access_level']}")
-                        st.markdown(f"**Department:** {doc.get('department', 'General')}")
+                        st.markdown(f"**Department:** {doc.get('department') or 'General'}")
                     
                     with col2:
                         st.markdown(f"**File Type:** {doc['file_type']}")
@@ -436,7 +717,7 @@ def document_management():
                     
                     with col3:
                         st.markdown(f"**Uploaded:** {doc['created_at'][:10]}")
-                        st.markdown(f"**Size:** {doc.get('file_size', 'Unknown')} bytes")
+                        st.markdown(f"**Size:** {doc.get('file_size') or 'Unknown'} bytes")
         else:
             st.info("No documents found. Upload your first document above!")
     else:
@@ -454,7 +735,7 @@ def system_status():
         return
     
     # Get system status
-    status = st.session_state.api_client.get_system_status()
+    status = fetch_cached("get_system_status", force=st.session_state.pop("refresh_status", False))
     
     if "error" not in status:
         # Overall status
@@ -527,22 +808,16 @@ def system_status():
             
             with col1:
                 if st.button("View Available Models"):
-                    models_info = st.session_state.api_client.session.get(
-                        f"{st.session_state.api_client.base_url}/api/v1/admin/embedding-models"
-                    )
-                    if models_info.status_code == 200:
-                        models_data = models_info.json()
+                    models_data = get_api_client().get_embedding_models()
+                    if "error" not in models_data:
                         st.json(models_data)
                     else:
                         st.error("Failed to fetch model information")
             
             with col2:
                 if st.button("Benchmark Current Model"):
-                    benchmark_result = st.session_state.api_client.session.get(
-                        f"{st.session_state.api_client.base_url}/api/v1/admin/embedding-models/benchmark"
-                    )
-                    if benchmark_result.status_code == 200:
-                        benchmark_data = benchmark_result.json()
+                    benchmark_data = get_api_client().benchmark_embedding_model()
+                    if "error" not in benchmark_data:
                         st.success("Benchmark completed!")
                         st.json(benchmark_data)
                     else:
@@ -550,12 +825,27 @@ def system_status():
         
         # Refresh button
         if st.button("Refresh Status"):
+            st.session_state.refresh_status = True
             st.rerun()
     
     else:
         st.error(f"Error loading system status: {status['error']}")
 
 
+@st.cache_data(ttl=60, show_spinner=False)
+def _pie_chart(items: tuple, title: str):
+    """Pie chart of (label, count) pairs, rebuilt only when the data changes"""
+    import plotly.express as px
+    return px.pie(values=[v for _, v in items], names=[k for k, _ in items], title=title)
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _bar_chart(items: tuple, title: str):
+    """Bar chart of (label, count) pairs, rebuilt only when the data changes"""
+    import plotly.express as px
+    return px.bar(x=[k for k, _ in items], y=[v for _, v in items], title=title)
+
+
 def analytics_dashboard():
     """Analytics dashboard (manager/admin only)"""
     st.markdown('<h1 class="main-header">📊 Analytics Dashboard</h1>', unsafe_allow_html=True)
@@ -567,7 +857,7 @@ def analytics_dashboard():
         return
     
     # Get analytics data
-    analytics = st.session_state.api_client.get_analytics()
+    analytics = fetch_cached("get_analytics")
     
     if "error" not in analytics:
         # Overview metrics
@@ -594,11 +884,7 @@ def analytics_dashboard():
             users_by_role = analytics["users_by_role"]
             
             if users_by_role:
-                fig_users = px.pie(
-                    values=list(users_by_role.values()),
-                    names=list(users_by_role.keys()),
-                    title="User Distribution by Role"
-                )
+                fig_users = _pie_chart(tuple(users_by_role.items()), "User Distribution by Role")
                 st.plotly_chart(fig_users, use_container_width=True)
         
         with col2:
@@ -607,11 +893,7 @@ def analytics_dashboard():
             docs_by_access = analytics["documents_by_access_level"]
             
             if docs_by_access:
-                fig_docs = px.bar(
-                    x=list(docs_by_access.keys()),
-                    y=list(docs_by_access.values()),
-                    title="Documents by Access Level"
-                )
+                fig_docs = _bar_chart(tuple(docs_by_access.items()), "Documents by Access Level")
                 st.plotly_chart(fig_docs, use_container_width=True)
         
         # Documents by department
@@ -619,11 +901,7 @@ def analytics_dashboard():
         docs_by_dept = analytics["documents_by_department"]
         
         if docs_by_dept:
-            fig_dept = px.bar(
-                x=list(docs_by_dept.keys()),
-                y=list(docs_by_dept.values()),
-                title="Documents by Department"
-            )
+            fig_dept = _bar_chart(tuple(docs_by_dept.items()), "Documents by Department")
             st.plotly_chart(fig_dept, use_container_width=True)
         
         # Raw data
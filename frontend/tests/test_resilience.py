@@ -0,0 +1,206 @@
+"""
+Tests for the API client's circuit breaker and request deduplication
+"""
+import threading
+import time
+
+import pytest
+
+import resilience
+from resilience import CircuitBreaker, CircuitOpenError, SingleFlight
+
+
+class FakeClock:
+    """Stand-in for the time module whose clock only moves when told to"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(resilience, "time", fake)
+    return fake
+
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker(failure_threshold=3, reset_seconds=30)
+
+
+def open_circuit(breaker: CircuitBreaker, endpoint: str = "/ask"):
+    for _ in range(breaker.failure_threshold):
+        breaker.check(endpoint)
+        breaker.record_failure(endpoint)
+
+
+def test_opens_after_threshold_consecutive_failures(breaker):
+    breaker.record_failure("/ask")
+    breaker.record_failure("/ask")
+    breaker.check("/ask")
+
+    breaker.record_failure("/ask")
+    with pytest.raises(CircuitOpenError):
+        breaker.check("/ask")
+
+
+def test_success_resets_failure_count(breaker):
+    breaker.record_failure("/ask")
+    breaker.record_failure("/ask")
+    breaker.record_success("/ask")
+    breaker.record_failure("/ask")
+
+    breaker.check("/ask")
+
+
+def test_endpoints_are_independent(breaker):
+    open_circuit(breaker, "/ask")
+
+    breaker.check("/documents")
+
+
+def test_stays_open_until_cooldown_ends(breaker, clock):
+    open_circuit(breaker)
+
+    clock.advance(29)
+    with pytest.raises(CircuitOpenError):
+        breaker.check("/ask")
+
+    clock.advance(2)
+    breaker.check("/ask")
+
+
+def test_half_open_lets_exactly_one_probe_through(breaker, clock):
+    open_circuit(breaker)
+    clock.advance(31)
+
+    breaker.check("/ask")
+    with pytest.raises(CircuitOpenError):
+        breaker.check("/ask")
+
+
+def test_successful_probe_closes_circuit(breaker, clock):
+    open_circuit(breaker)
+    clock.advance(31)
+
+    breaker.check("/ask")
+    breaker.record_success("/ask")
+
+    breaker.check("/ask")
+    breaker.check("/ask")
+
+
+def test_failed_probe_restarts_cooldown(breaker, clock):
+    open_circuit(breaker)
+    clock.advance(31)
+
+    breaker.check("/ask")
+    breaker.record_failure("/ask")
+
+    clock.advance(29)
+    with pytest.raises(CircuitOpenError):
+        breaker.check("/ask")
+
+    clock.advance(2)
+    breaker.check("/ask")
+
+
+def test_release_frees_the_probe_without_closing(breaker, clock):
+    open_circuit(breaker)
+    clock.advance(31)
+
+    breaker.check("/ask")
+    breaker.release("/ask")
+
+    # The next caller becomes the probe; the circuit is still not closed
+    breaker.check("/ask")
+    with pytest.raises(CircuitOpenError):
+        breaker.check("/ask")
+
+
+def wait_for_waiters(single_flight: SingleFlight, key, count: int):
+    """Block until count callers are waiting on the in-flight call for key"""
+    future = single_flight._inflight[key]
+    deadline = time.monotonic() + 5
+    while len(future._condition._waiters) < count:
+        assert time.monotonic() < deadline, "followers never started waiting"
+        time.sleep(0.001)
+
+
+def run_concurrently(single_flight: SingleFlight, key, fn, followers: int = 4):
+    """Start a leader call, join followers to it, then let it finish"""
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+    outcomes = []
+    outcomes_lock = threading.Lock()
+
+    def blocking_fn():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return fn()
+
+    def caller():
+        try:
+            outcome = single_flight.do(key, blocking_fn)
+        except Exception as e:
+            outcome = e
+        with outcomes_lock:
+            outcomes.append(outcome)
+
+    leader = threading.Thread(target=caller)
+    leader.start()
+    assert started.wait(5)
+
+    threads = [threading.Thread(target=caller) for _ in range(followers)]
+    for thread in threads:
+        thread.start()
+    wait_for_waiters(single_flight, key, followers)
+
+    release.set()
+    for thread in [leader, *threads]:
+        thread.join(5)
+
+    return calls, outcomes
+
+
+def test_concurrent_callers_share_one_call():
+    single_flight = SingleFlight()
+
+    calls, outcomes = run_concurrently(single_flight, ("get_analytics", "token"), lambda: {"total_users": 3})
+
+    assert len(calls) == 1
+    assert outcomes == [{"total_users": 3}] * 5
+    assert not single_flight._inflight
+
+
+def test_error_reaches_every_waiter_without_poisoning_the_key():
+    single_flight = SingleFlight()
+    key = ("get_analytics", "token")
+
+    def fail():
+        raise RuntimeError("backend down")
+
+    calls, outcomes = run_concurrently(single_flight, key, fail)
+
+    assert len(calls) == 1
+    assert len(outcomes) == 5
+    assert all(isinstance(outcome, RuntimeError) for outcome in outcomes)
+
+    # The next call runs afresh instead of replaying the failure
+    assert single_flight.do(key, lambda: "recovered") == "recovered"
+
+
+def test_different_keys_do_not_share_calls():
+    single_flight = SingleFlight()
+
+    assert single_flight.do(("get_analytics", "alice"), lambda: "alice") == "alice"
+    assert single_flight.do(("get_analytics", "bob"), lambda: "bob") == "bob"